@@ -0,0 +1,34 @@
+"""Widen response cache body on MySQL
+
+Revision ID: 4a9c2e7b1d53
+Revises: 7d3e8a1c5b96
+Create Date: 2026-10-19 18:02:11.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = '4a9c2e7b1d53'
+down_revision = '7d3e8a1c5b96'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Only MySQL limits TEXT to 64 KB, the other databases keep their type
+    if op.get_bind().dialect.name == 'mysql':
+        op.alter_column('responsecache', 'body',
+                        existing_type=sa.Text(),
+                        type_=mysql.MEDIUMTEXT(),
+                        existing_nullable=False)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'mysql':
+        op.alter_column('responsecache', 'body',
+                        existing_type=mysql.MEDIUMTEXT(),
+                        type_=sa.Text(),
+                        existing_nullable=False)
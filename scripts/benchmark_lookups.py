@@ -0,0 +1,109 @@
+"""
+Microbenchmark of the user lookups built with plain selects and with
+lambda statements, first without and then with the query cache
+
+    python scripts/benchmark_lookups.py [--iterations 2000]
+
+Prints the CPU time per lookup in microseconds. The numbers are noisy
+between runs, compare them within one run only.
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.future import select
+from sqlmodel import SQLModel
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# pylint: disable=wrong-import-position
+from tracktor.config import Config, configure
+from tracktor.models import User
+from tracktor.utils.auth import get_super_admin, get_user
+from tracktor.utils.cache import install_query_cache, query_cache
+from tracktor.utils.database import dispose_engine, get_session_factory
+
+
+async def _plain_super_admin(session):
+    return (await session.execute(select(User).where(User.id == 1))).scalars().first()
+
+
+async def _plain_user(session):
+    return (
+        (await session.execute(select(User).where(User.name == "admin")))
+        .scalars()
+        .first()
+    )
+
+
+async def _lambda_user(session):
+    return await get_user("admin", session)
+
+
+LOOKUPS = (
+    ("get_super_admin select", _plain_super_admin),
+    ("get_super_admin lambda", get_super_admin),
+    ("get_user select", _plain_user),
+    ("get_user lambda", _lambda_user),
+)
+
+
+async def _measure(lookup, iterations: int) -> float:
+    async with get_session_factory()() as session:
+        await lookup(session)
+        start = time.process_time()
+        for _ in range(iterations):
+            await lookup(session)
+        return (time.process_time() - start) / iterations * 1_000_000
+
+
+async def _run(iterations: int):
+    for cached in (False, True):
+        if cached:
+            install_query_cache()
+            query_cache.clear()
+        for name, lookup in LOOKUPS:
+            micros = await _measure(lookup, iterations)
+            label = "with" if cached else "without"
+            print(f"{name:<24} {label:>7} query cache {micros:8.0f} us")
+    await dispose_engine()
+
+
+def main():
+    """
+    Seeds a temporary database with the admin user and runs all lookups
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        path = f"{directory}/benchmark.db"
+        engine = create_engine(f"sqlite:///{path}")
+        SQLModel.metadata.create_all(engine)
+        with engine.begin() as connection:
+            connection.execute(
+                User.__table__.insert().values(
+                    id=1,
+                    entity_id="admin",
+                    name="admin",
+                    password="",
+                    admin=True,
+                    created_at=datetime.utcnow(),
+                )
+            )
+        configure(
+            Config(
+                SQLALCHEMY_DATABASE_URI=f"sqlite+aiosqlite:///{path}",
+                QUERY_CACHE_SIZE=1000,
+            )
+        )
+        asyncio.run(_run(args.iterations))
+
+
+if __name__ == "__main__":
+    main()
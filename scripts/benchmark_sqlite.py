@@ -0,0 +1,132 @@
+"""
+Benchmark of concurrent readers and writers on SQLite with the connection
+profiles of tracktor.utils.sqlite
+
+    python scripts/benchmark_sqlite.py [--readers 8] [--writers 2] [--seconds 5]
+
+Every reader and writer opens a session per operation like a request does.
+Prints the operations per second of the default NullPool engine without the
+profile and of the pooled engine with a rollback journal and with WAL.
+"""
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.future import select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# pylint: disable=wrong-import-position
+from tracktor.config import Config, configure
+from tracktor.utils.database import dispose_engine, get_session_factory
+
+ROWS = 1000
+METADATA = MetaData()
+BENCHMARK = Table(
+    "benchmark",
+    METADATA,
+    Column("id", Integer, primary_key=True),
+    Column("value", String, nullable=False),
+)
+
+
+async def _reader(factory: sessionmaker, deadline: float) -> int:
+    operations = 0
+    while time.monotonic() < deadline:
+        async with factory() as session:
+            await session.execute(
+                select(BENCHMARK).where(BENCHMARK.c.id == random.randint(1, ROWS))
+            )
+        operations += 1
+    return operations
+
+
+async def _writer(factory: sessionmaker, deadline: float) -> int:
+    operations = 0
+    while time.monotonic() < deadline:
+        async with factory() as session:
+            await session.execute(BENCHMARK.insert().values(value="x" * 100))
+            await session.commit()
+        operations += 1
+    return operations
+
+
+async def _measure(factory: sessionmaker, args) -> tuple:
+    deadline = time.monotonic() + args.seconds
+    reads = asyncio.gather(*(_reader(factory, deadline) for _ in range(args.readers)))
+    writes = asyncio.gather(*(_writer(factory, deadline) for _ in range(args.writers)))
+    return sum(await reads) / args.seconds, sum(await writes) / args.seconds
+
+
+def _database(directory: str, name: str) -> str:
+    path = f"{directory}/{name}.db"
+    engine = create_engine(f"sqlite:///{path}")
+    METADATA.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(BENCHMARK.insert(), [{"value": "x" * 100}] * ROWS)
+    engine.dispose()
+    return f"sqlite+aiosqlite:///{path}"
+
+
+async def _default(url: str, args) -> tuple:
+    engine = create_async_engine(url, poolclass=NullPool, future=True)
+    try:
+        return await _measure(sessionmaker(engine, class_=AsyncSession), args)
+    finally:
+        await engine.dispose()
+
+
+async def _profile(url: str, journal_mode: str, synchronous: str, args) -> tuple:
+    configure(
+        Config(
+            SQLALCHEMY_DATABASE_URI=url,
+            SQLITE_JOURNAL_MODE=journal_mode,
+            SQLITE_SYNCHRONOUS=synchronous,
+        )
+    )
+    try:
+        return await _measure(get_session_factory(), args)
+    finally:
+        await dispose_engine()
+
+
+def main():
+    """
+    Runs the workload against a fresh database for every profile
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        results = (
+            (
+                "NullPool, default journal",
+                asyncio.run(_default(_database(directory, "default"), args)),
+            ),
+            (
+                "pooled, DELETE journal, synchronous=FULL",
+                asyncio.run(
+                    _profile(_database(directory, "delete"), "DELETE", "FULL", args)
+                ),
+            ),
+            (
+                "pooled, WAL, synchronous=NORMAL",
+                asyncio.run(_profile(_database(directory, "wal"), "WAL", "NORMAL", args)),
+            ),
+        )
+    for name, (reads, writes) in results:
+        print(f"{name:<42} read {reads:6.0f}/s  write {writes:6.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Shared fixtures of the tests
+"""
+import asyncio
+from typing import Awaitable, Callable
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+
+import tracktor.models  # noqa: F401 pylint: disable=unused-import
+from tracktor.config import Config, config, configure
+from tracktor.utils.cache import query_cache
+from tracktor.utils.database import dispose_engine, get_session_factory
+
+
+@pytest.fixture(name="database")
+def fixture_database(tmp_path) -> str:
+    """
+    Points the config at an empty sqlite database with all tables and returns
+    its path. The query cache starts empty, as results of other databases
+    share its keys.
+    """
+    path = str(tmp_path / "tracktor.db")
+    SQLModel.metadata.create_all(create_engine(f"sqlite:///{path}"))
+    previous = dict(config.__dict__)
+    configure(Config(SQLALCHEMY_DATABASE_URI=f"sqlite+aiosqlite:///{path}"))
+    query_cache.clear()
+    yield path
+    asyncio.run(dispose_engine())
+    query_cache.clear()
+    config.__dict__.clear()
+    config.__dict__.update(previous)
+
+
+@pytest.fixture(name="run")
+def fixture_run(database) -> Callable:
+    """
+    Runs a coroutine function with the session factory of the test database
+    in its own event loop and disposes the engine afterwards
+    """
+    # pylint: disable=unused-argument
+
+    def run(func: Callable[[sessionmaker], Awaitable]):
+        async def main():
+            try:
+                return await func(get_session_factory())
+            finally:
+                await dispose_engine()
+
+        return asyncio.run(main())
+
+    return run
@@ -0,0 +1,49 @@
+"""
+Consistency of streaming backups
+"""
+import gzip
+import json
+import sqlite3
+
+from sqlalchemy import event
+
+from tracktor.utils.backup import dump
+from tracktor.utils.database import get_engine
+
+
+def _rows(path: str) -> dict:
+    rows, table = {}, None
+    with gzip.open(path, "rt", encoding="utf-8") as archive:
+        for line in map(json.loads, archive):
+            if isinstance(line, dict) and "table" in line:
+                table = line["table"]
+                rows[table] = []
+            elif table:
+                rows[table].append(line)
+    return rows
+
+
+def test_dump_reads_one_snapshot(database, run, tmp_path):
+    """
+    A row committed by another connection while the dump runs is not part of
+    the tables read after it
+    """
+    path = str(tmp_path / "backup.ndjson.gz")
+
+    def write_once(_connection, _cursor, statement, *_args):
+        if "FROM cacheversion" in statement and not write_once.done:
+            write_once.done = True
+            with sqlite3.connect(database) as other:
+                other.execute("INSERT INTO category (name) VALUES ('written during dump')")
+
+    write_once.done = False
+
+    async def backup(_session_factory):
+        event.listen(get_engine().sync_engine, "after_cursor_execute", write_once)
+        await dump(get_engine(), path, 100)
+
+    run(backup)
+    assert write_once.done
+    assert _rows(path)["category"] == []
+    with sqlite3.connect(database) as connection:
+        assert connection.execute("SELECT count(*) FROM category").fetchone() == (1,)
@@ -0,0 +1,92 @@
+"""
+Cold start budget of the api
+
+Every measurement runs in a fresh interpreter, so nothing imported by pytest
+or an earlier test is already cached.
+"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_BUDGET_SECONDS = 2.0
+FIRST_REQUEST_BUDGET_SECONDS = 5.0
+
+IMPORT_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import tracktor
+print(json.dumps({
+    "seconds": time.perf_counter() - started,
+    "modules": [x for x in sys.modules if x.startswith(("tracktor.routers", "tracktor.utils.database"))],
+}))
+"""
+
+FIRST_REQUEST_SCRIPT = """
+import json, time
+started = time.perf_counter()
+from fastapi.testclient import TestClient
+import tracktor
+client = TestClient(tracktor.create_app())
+response = client.get("/versions/")
+print(json.dumps({
+    "seconds": time.perf_counter() - started,
+    "status": response.status_code,
+}))
+"""
+
+
+def _run(script: str, **env) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=ROOT,
+        env={**os.environ, "PYTHONPATH": ROOT, "ACCESS_LOG": "0", **env},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+@pytest.fixture(name="database")
+def fixture_database(tmp_path) -> str:
+    """
+    Path of an empty sqlite database with all tables
+    """
+    path = str(tmp_path / "tracktor.db")
+    subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, sqlalchemy, sqlmodel, tracktor.models;"
+            "sqlmodel.SQLModel.metadata.create_all("
+            "sqlalchemy.create_engine('sqlite:///' + sys.argv[1]))",
+            path,
+        ],
+        cwd=ROOT,
+        env={**os.environ, "PYTHONPATH": ROOT},
+        check=True,
+    )
+    return path
+
+
+def test_import_is_lazy():
+    """
+    Importing tracktor neither builds the engine nor imports the routers, even
+    without any database variables
+    """
+    result = _run(IMPORT_SCRIPT, DATABASE_TYPE="mysql")
+    assert result["modules"] == []
+    assert result["seconds"] < IMPORT_BUDGET_SECONDS
+
+
+def test_first_request(database):
+    """
+    Building the app and answering the first request stays within budget
+    """
+    result = _run(FIRST_REQUEST_SCRIPT, DATABASE_PATH=database)
+    assert result["status"] == 200
+    assert result["seconds"] < FIRST_REQUEST_BUDGET_SECONDS
@@ -0,0 +1,33 @@
+"""
+Configuration of the app factory
+"""
+import asyncio
+
+import pytest
+
+from tracktor import create_app
+from tracktor.config import Config, config
+from tracktor.error import ConfigurationError
+from tracktor.utils.database import dispose_engine, get_engine
+
+
+def test_settings_apply_before_engine(database):
+    """
+    Settings given to the factory are used as long as no engine exists
+    """
+    # pylint: disable=unused-argument
+    create_app(Config(QUERY_CACHE_SIZE=5))
+    assert config.QUERY_CACHE_SIZE == 5
+
+
+def test_settings_rejected_after_engine(database):
+    """
+    Settings can not change once the engine was built from the old ones
+    """
+    # pylint: disable=unused-argument
+    get_engine()
+    with pytest.raises(ConfigurationError):
+        create_app(Config(QUERY_CACHE_SIZE=5))
+    asyncio.run(dispose_engine())
+    create_app(Config(QUERY_CACHE_SIZE=5))
+    assert config.QUERY_CACHE_SIZE == 5
@@ -0,0 +1,89 @@
+"""
+Query cache isolation between sessions
+"""
+import asyncio
+
+import pytest
+from sqlalchemy.future import select
+
+from tracktor.models import Category
+from tracktor.utils.cache import install_query_cache, query_cache
+
+
+@pytest.fixture(name="cached", autouse=True)
+def fixture_cached(run):
+    """
+    Enables the query cache with one stored category
+    """
+    install_query_cache()
+    query_cache.clear()
+
+    async def create(session_factory):
+        async with session_factory() as session:
+            await Category.create(session, "Rock")
+            await session.commit()
+
+    run(create)
+    yield
+    query_cache.clear()
+
+
+def _rock():
+    return select(Category).where(Category.name == "Rock")
+
+
+def test_rollback_of_populating_session(run):
+    """
+    A rollback of the session that filled the cache does not expire the
+    instances served to other sessions
+    """
+
+    async def scenario(session_factory):
+        async with session_factory() as session:
+            (await session.execute(_rock())).scalars().one()
+            await session.rollback()
+        async with session_factory() as session:
+            return (await session.execute(_rock())).scalars().one().name
+
+    assert run(scenario) == "Rock"
+    assert query_cache.hits == 1
+
+
+def test_uncommitted_changes_stay_in_their_session(run):
+    """
+    A cache hit neither fails nor sees the pending change of another session
+    """
+
+    async def scenario(session_factory):
+        async with session_factory() as first, session_factory() as second:
+            category = (await first.execute(_rock())).scalars().one()
+            category.name = "Dirty"
+            other = (await second.execute(_rock())).scalars().one()
+            return other is category, other.name
+
+    assert run(scenario) == (False, "Rock")
+
+
+def test_concurrent_sessions_hit_same_key(run):
+    """
+    Concurrent sessions reading the same key get their own instances
+    """
+
+    async def read(session_factory):
+        async with session_factory() as session:
+            category = (await session.execute(_rock())).scalars().one()
+            await asyncio.sleep(0)
+            category.name = f"Changed {id(session)}"
+            return category
+
+    async def scenario(session_factory):
+        async with session_factory() as session:
+            (await session.execute(_rock())).scalars().one()
+        categories = await asyncio.gather(*(read(session_factory) for _ in range(8)))
+        async with session_factory() as session:
+            return categories, (await session.execute(_rock())).scalars().one().name
+
+    categories, name = run(scenario)
+    assert len({id(x) for x in categories}) == len(categories)
+    assert name == "Rock"
+    assert query_cache.hits >= len(categories)
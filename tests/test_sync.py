@@ -0,0 +1,52 @@
+"""
+Incremental sync around change ids that are not committed yet
+"""
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from tracktor import create_app
+
+
+@pytest.fixture(name="client")
+def fixture_client(database) -> TestClient:
+    """
+    Client of an app using the test database
+    """
+    # pylint: disable=unused-argument
+    return TestClient(create_app())
+
+
+def _changes(database: str, *changes):
+    with sqlite3.connect(database) as connection:
+        connection.executemany(
+            "INSERT INTO changelog (id, entity_type, entity_id, deleted, created_at)"
+            " VALUES (?, 'category', ?, 1, ?)",
+            [(x, str(x), created_at.isoformat(" ")) for x, created_at in changes],
+        )
+
+
+def test_page_stops_at_fresh_gap(database, client):
+    """
+    A gap of a possibly uncommitted change keeps the cursor in front of it
+    and tells the client to sync again
+    """
+    now = datetime.utcnow()
+    _changes(database, (1, now), (2, now), (4, now))
+    response = client.get("/sync/", params={"since": 0}).json()
+    assert response["cursor"] == 2
+    assert response["has_more"] is True
+    assert [x["entity_id"] for x in response["deleted"]] == ["1", "2"]
+
+
+def test_page_skips_settled_gap(database, client):
+    """
+    A gap older than the settle window belongs to a rolled back transaction
+    """
+    old = datetime.utcnow() - timedelta(minutes=1)
+    _changes(database, (1, old), (3, old))
+    response = client.get("/sync/", params={"since": 0}).json()
+    assert response["cursor"] == 3
+    assert response["has_more"] is False
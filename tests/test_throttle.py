@@ -0,0 +1,59 @@
+"""
+Login throttle state shared by several workers
+"""
+from tracktor.config import Config, configure
+from tracktor.utils.throttle import (
+    DatabaseThrottleStore,
+    LoginThrottle,
+    MemoryThrottleStore,
+)
+
+
+def test_workers_share_bucket(run):
+    """
+    Tokens taken by one worker are missing in the bucket of the other
+    """
+
+    async def consume(_):
+        first, second = DatabaseThrottleStore(), DatabaseThrottleStore()
+        taken = [
+            await store.consume("ip:1", 3, 1.0, 100.0)
+            for store in (first, second, first, second)
+        ]
+        refilled = await second.consume("ip:1", 3, 1.0, 101.0)
+        return taken, refilled
+
+    taken, refilled = run(consume)
+    assert taken[:3] == [0, 0, 0]
+    assert taken[3] == 1.0
+    assert refilled == 0
+
+
+def test_workers_share_lockout(run):
+    """
+    Failures recorded by one worker lock the key out for the other
+    """
+
+    async def fail(_):
+        first, second = DatabaseThrottleStore(), DatabaseThrottleStore()
+        for now in (10.0, 11.0, 12.0):
+            await first.add_failure("user:alice", 3, now)
+        locked = await second.locked_for("user:alice", 3, 60, 20.0)
+        expired = await second.locked_for("user:alice", 3, 60, 71.0)
+        await second.clear_failures("user:alice")
+        cleared = await first.locked_for("user:alice", 3, 60, 20.0)
+        return locked, expired, cleared
+
+    assert run(fail) == (50.0, 0, 0)
+
+
+def test_memory_store_is_per_worker(database):
+    """
+    A single worker keeps the state in memory, several use the database
+    """
+    # pylint: disable=unused-argument
+    assert isinstance(LoginThrottle().store, MemoryThrottleStore)
+    configure(Config(WORKERS=2))
+    assert isinstance(LoginThrottle().store, DatabaseThrottleStore)
+    configure(Config(LOGIN_THROTTLE_STORE="memory"))
+    assert isinstance(LoginThrottle().store, MemoryThrottleStore)
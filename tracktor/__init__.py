@@ -1,23 +1,114 @@
 """
 Main module for tracktor api
 """
-from fastapi import FastAPI, logger
-from fastapi.middleware.cors import CORSMiddleware
+import importlib
+from typing import Optional
 
-from tracktor.config import config
-from tracktor.routers import admin, auth, version
+from tracktor.config import Config
 
-app = FastAPI()
+ROUTERS = (
+    "admin",
+    "auth",
+    "category",
+    "events",
+    "image",
+    "playlist",
+    "stats",
+    "sync",
+    "version",
+)
 
-if config.CORS_DOMAIN:
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=[f"http://{config.CORS_DOMAIN}", f"https://{config.CORS_DOMAIN}"],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
+
+def create_app(settings: Optional[Config] = None):
+    """
+    Creates the tracktor api. Routers are only imported here so importing the
+    package stays cheap for migrations and command line tools.
+    """
+    # pylint: disable=import-outside-toplevel
+    from fastapi import FastAPI
+    from fastapi.middleware.cors import CORSMiddleware
+
+    from tracktor.config import config, configure
+    from tracktor.utils.cache import install_query_cache
+    from tracktor.utils.coherence import coherence_enabled, install_coherence
+    from tracktor.utils.logs import AccessLogMiddleware
+    from tracktor.utils.singleflight import SingleFlightMiddleware
+    from tracktor.utils.versions import install_openapi, registry
+
+    if settings:
+        configure(settings)
+    if config.QUERY_CACHE_SIZE:
+        install_query_cache()
+    if coherence_enabled():
+        install_coherence()
+
+    application = FastAPI()
+    application.add_middleware(
+        SingleFlightMiddleware,
+        paths=("/playlists", "/categories", "/stats", "/sync", "/versions"),
+        timeout=config.SINGLE_FLIGHT_TIMEOUT_SECONDS,
     )
 
-app.include_router(admin.router)
-app.include_router(auth.router)
-app.include_router(version.router)
+    if config.ACCESS_LOG:
+        application.add_middleware(AccessLogMiddleware)
+
+    if config.CORS_DOMAIN:
+        application.add_middleware(
+            CORSMiddleware,
+            allow_origins=[
+                f"http://{config.CORS_DOMAIN}",
+                f"https://{config.CORS_DOMAIN}",
+            ],
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+        )
+
+    for name in ROUTERS:
+        application.include_router(
+            importlib.import_module(f"tracktor.routers.{name}").router
+        )
+    registry.mount(application)
+    install_openapi(application)
+    _add_background_tasks(application)
+
+    return application
+
+
+def _add_background_tasks(application):
+    # pylint: disable=import-outside-toplevel
+    from tracktor.config import config
+    from tracktor.utils.coherence import coherence_enabled, watcher
+    from tracktor.utils.database import dispose_engine
+    from tracktor.utils.images import image_store
+    from tracktor.utils.logs import log_pipeline
+    from tracktor.utils.sqlite import maintenance
+    from tracktor.utils.writebehind import write_behind
+
+    tasks = [log_pipeline, write_behind]
+    if coherence_enabled():
+        tasks.append(watcher)
+    if (
+        config.SQLALCHEMY_DATABASE_URI.startswith("sqlite")
+        and config.SQLITE_MAINTENANCE_INTERVAL_SECONDS
+    ):
+        tasks.append(maintenance)
+    for task in tasks:
+        application.add_event_handler("startup", task.start)
+    # Stop in reverse so buffered writes are flushed before the engine is
+    # disposed and logged before the log writer stops
+    for task in reversed(tasks[1:]):
+        application.add_event_handler("shutdown", task.stop)
+    application.add_event_handler("shutdown", image_store.close)
+    application.add_event_handler("shutdown", dispose_engine)
+    application.add_event_handler("shutdown", log_pipeline.stop)
+
+
+def __getattr__(name):
+    """
+    Creates the default app on first access of ``tracktor.app``
+    """
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,149 @@
+"""
+Command line tools for tracktor
+
+Usage: python -m tracktor.cli <command>
+"""
+import argparse
+import asyncio
+import time
+from typing import List
+
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from tracktor.config import config
+from tracktor.error import BackupError
+from tracktor.utils.backup import TableReport, dump, restore
+from tracktor.utils.coherence import install_coherence, invalidate_all
+from tracktor.utils.database import dispose_engine, get_engine, get_session_factory
+from tracktor.utils.enrich import HttpxFetcher, enrich_links
+from tracktor.utils.stats import rebuild_stats
+
+URL_ARGUMENT = (
+    ("--url",),
+    {"help": "SQLAlchemy database url, defaults to the configured database"},
+)
+
+
+async def _rebuild_stats(_args: argparse.Namespace):
+    async with get_session_factory()() as session:
+        await rebuild_stats(session)
+
+
+def _engine(args: argparse.Namespace) -> AsyncEngine:
+    return create_async_engine(args.url, future=True) if args.url else get_engine()
+
+
+def _report(reports: List[TableReport], started: float):
+    for report in reports:
+        print(
+            f"{report.table}: {report.rows} rows, "
+            f"{report.rows_per_second:.0f} rows/s"
+        )
+    seconds = time.perf_counter() - started
+    rows = sum(x.rows for x in reports)
+    print(f"total: {rows} rows in {seconds:.2f}s, {rows / seconds:.0f} rows/s")
+
+
+async def _backup(args: argparse.Namespace):
+    engine, started = _engine(args), time.perf_counter()
+    try:
+        _report(await dump(engine, args.path, args.chunk_size), started)
+    finally:
+        if args.url:
+            await engine.dispose()
+
+
+async def _restore(args: argparse.Namespace):
+    engine, started = _engine(args), time.perf_counter()
+    try:
+        _report(await restore(engine, args.path, args.batch_size), started)
+        await invalidate_all(engine)
+    finally:
+        if args.url:
+            await engine.dispose()
+
+
+async def _enrich_links(args: argparse.Namespace):
+    fetcher = HttpxFetcher(args.concurrency, config.ENRICH_TIMEOUT_SECONDS)
+    try:
+        report = await enrich_links(
+            get_session_factory(), fetcher, args.concurrency, args.batch_size
+        )
+    finally:
+        await fetcher.close()
+    print(
+        f"{report.playlists} playlists in {report.seconds:.2f}s, "
+        f"{report.requests} requests, {report.cache_hits} cache hits"
+    )
+    for status, count in sorted(report.links.items()):
+        print(f"{status}: {count} links")
+
+
+async def _invalidate_caches(_args: argparse.Namespace):
+    await invalidate_all(get_engine())
+
+
+COMMANDS = {
+    "rebuild-stats": (_rebuild_stats, "Recount all catalog statistics", ()),
+    "backup": (
+        _backup,
+        "Stream all tables into a compressed backup file",
+        (
+            (("path",), {"help": "File to write, e.g. tracktor.ndjson.gz"}),
+            URL_ARGUMENT,
+            (("--chunk-size",), {"type": int, "default": 1000}),
+        ),
+    ),
+    "restore": (
+        _restore,
+        "Load a backup file into an empty database",
+        (
+            (("path",), {"help": "Backup file to read"}),
+            URL_ARGUMENT,
+            (("--batch-size",), {"type": int, "default": 1000}),
+        ),
+    ),
+    "enrich-links": (
+        _enrich_links,
+        "Resolve the streaming links of all playlists to canonical ids and metadata",
+        (
+            (("--concurrency",), {"type": int, "default": config.ENRICH_CONCURRENCY}),
+            (("--batch-size",), {"type": int, "default": 200}),
+        ),
+    ),
+    "invalidate-caches": (
+        _invalidate_caches,
+        "Make all running workers drop their cached query results",
+        (),
+    ),
+}
+
+
+async def _run(args: argparse.Namespace):
+    # Writes of the commands have to bump the table versions like the api
+    # does, otherwise running workers keep serving their cached results
+    install_coherence()
+    try:
+        await COMMANDS[args.command][0](args)
+    finally:
+        await dispose_engine()
+
+
+def main():
+    """
+    Parses the command line and runs the given command
+    """
+    parser = argparse.ArgumentParser(prog="python -m tracktor.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, (_, help_text, arguments) in COMMANDS.items():
+        command = commands.add_parser(name, help=help_text)
+        for flags, options in arguments:
+            command.add_argument(*flags, **options)
+    try:
+        asyncio.run(_run(parser.parse_args()))
+    except BackupError as err:
+        parser.exit(1, f"{err.message}\n")
+
+
+if __name__ == "__main__":
+    main()
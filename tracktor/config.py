@@ -2,10 +2,12 @@
 Module that contains all configuration options
 """
 import os
+import sys
+from functools import cached_property
 
 from fastapi.security import OAuth2PasswordBearer
 
-from tracktor.error import DatabaseConstructionError
+from tracktor.error import ConfigurationError, DatabaseConstructionError
 
 basedir = os.path.abspath(os.path.dirname(__file__))
 supported_dbs = {
@@ -38,6 +40,10 @@ def _get_database_uri():
 class Config:  # pylint: disable=too-few-public-methods
     """
     Config object for tracktor
+
+    Every option can be overridden with a keyword argument. The database uri is
+    only built on first access, so importing tracktor never fails because of
+    missing database variables.
     """
 
     SECRET_KEY = os.environ.get(
@@ -45,13 +51,104 @@ class Config:  # pylint: disable=too-few-public-methods
         default="565e1e6d786028a24fb1ff06cbae8f13bc96fdcdeff63fd90321d90ca2839fd7",
     )
     ALGORITHM = "HS256"
-    SQLALCHEMY_DATABASE_URI = _get_database_uri()
     SQL_DEBUG = bool(os.environ.get("SQL_DEBUG"))
     ADMIN_USER = os.environ.get("ADMIN_USER", default="admin")
     ADMIN_PASSWORD = os.environ.get("ADMIN_PASSWORD", default="password")
     ACCESS_TOKEN_EXPIRE_MINUTES = 30
     OAUTH2_SCHEME = OAuth2PasswordBearer(tokenUrl="login")
     CORS_DOMAIN = os.environ.get("CORS_DOMAIN", default=None)
+    LOGIN_ATTEMPTS_PER_MINUTE = int(
+        os.environ.get("LOGIN_ATTEMPTS_PER_MINUTE", default=10)
+    )
+    LOGIN_ATTEMPTS_BURST = int(os.environ.get("LOGIN_ATTEMPTS_BURST", default=10))
+    LOGIN_MAX_USER_FAILURES = int(os.environ.get("LOGIN_MAX_USER_FAILURES", default=5))
+    LOGIN_MAX_IP_FAILURES = int(os.environ.get("LOGIN_MAX_IP_FAILURES", default=20))
+    LOGIN_FAILURE_WINDOW_SECONDS = int(
+        os.environ.get("LOGIN_FAILURE_WINDOW_SECONDS", default=900)
+    )
+    LOGIN_THROTTLE_STORE = os.environ.get("LOGIN_THROTTLE_STORE", default=None)
+    MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", default=100))
+    SINGLE_FLIGHT_TIMEOUT_SECONDS = int(
+        os.environ.get("SINGLE_FLIGHT_TIMEOUT_SECONDS", default=10)
+    )
+    SQL_COMPILED_CACHE_SIZE = int(
+        os.environ.get("SQL_COMPILED_CACHE_SIZE", default=1200)
+    )
+    PREPARED_STATEMENT_CACHE_SIZE = int(
+        os.environ.get("PREPARED_STATEMENT_CACHE_SIZE", default=500)
+    )
+    SQLITE_JOURNAL_MODE = os.environ.get("SQLITE_JOURNAL_MODE", default="WAL")
+    SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", default="NORMAL")
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", default=5000))
+    SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", default=268435456))
+    SQLITE_CACHE_SIZE = int(os.environ.get("SQLITE_CACHE_SIZE", default=-20000))
+    SQLITE_MAINTENANCE_INTERVAL_SECONDS = int(
+        os.environ.get("SQLITE_MAINTENANCE_INTERVAL_SECONDS", default=300)
+    )
+    WRITE_BEHIND_INTERVAL_SECONDS = float(
+        os.environ.get("WRITE_BEHIND_INTERVAL_SECONDS", default=5)
+    )
+    ACCESS_LOG = os.environ.get("ACCESS_LOG", default="1") != "0"
+    LOG_FILE = os.environ.get("LOG_FILE", default=None)
+    LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", default=10000))
+    LOG_BATCH_SIZE = int(os.environ.get("LOG_BATCH_SIZE", default=256))
+    IMAGE_DIR = os.environ.get("IMAGE_DIR", default=os.path.join(basedir, "../images"))
+    IMAGE_MAX_BYTES = int(os.environ.get("IMAGE_MAX_BYTES", default=10 * 1024 * 1024))
+    IMAGE_SIZES = tuple(
+        int(x) for x in os.environ.get("IMAGE_SIZES", default="160,320,640,1280").split(",")
+    )
+    IMAGE_WORKERS = int(os.environ.get("IMAGE_WORKERS", default=2))
+    ENRICH_CONCURRENCY = int(os.environ.get("ENRICH_CONCURRENCY", default=16))
+    ENRICH_RETRIES = int(os.environ.get("ENRICH_RETRIES", default=3))
+    ENRICH_BACKOFF_SECONDS = float(os.environ.get("ENRICH_BACKOFF_SECONDS", default=0.5))
+    ENRICH_TIMEOUT_SECONDS = float(os.environ.get("ENRICH_TIMEOUT_SECONDS", default=10))
+    ENRICH_CACHE_TTL_SECONDS = int(
+        os.environ.get("ENRICH_CACHE_TTL_SECONDS", default=7 * 24 * 3600)
+    )
+    ENRICH_SPOTIFY_URL = os.environ.get(
+        "ENRICH_SPOTIFY_URL", default="https://open.spotify.com"
+    )
+    ENRICH_APPLE_MUSIC_URL = os.environ.get(
+        "ENRICH_APPLE_MUSIC_URL", default="https://music.apple.com"
+    )
+    ENRICH_AMAZON_URL = os.environ.get(
+        "ENRICH_AMAZON_URL", default="https://music.amazon.com"
+    )
+    WORKERS = int(os.environ.get("WORKERS", default=1))
+    CACHE_SYNC_INTERVAL_SECONDS = float(
+        os.environ.get("CACHE_SYNC_INTERVAL_SECONDS", default=1)
+    )
+    CHANGELOG_SETTLE_SECONDS = float(
+        os.environ.get("CHANGELOG_SETTLE_SECONDS", default=5)
+    )
+    QUERY_CACHE_SIZE = int(os.environ.get("QUERY_CACHE_SIZE", default=1000))
+    EVENT_QUEUE_SIZE = int(os.environ.get("EVENT_QUEUE_SIZE", default=100))
+    EVENT_HEARTBEAT_SECONDS = int(os.environ.get("EVENT_HEARTBEAT_SECONDS", default=15))
+
+    def __init__(self, **overrides):
+        self.__dict__.update(overrides)
+
+    @cached_property
+    def SQLALCHEMY_DATABASE_URI(self):  # pylint: disable=invalid-name
+        """
+        Database uri built from the environment
+        """
+        return _get_database_uri()
 
 
 config = Config()
+
+
+def configure(settings: Config):
+    """
+    Applies the overrides of the given settings to the active config. The
+    database engine is built from the config on first use, so overrides are
+    rejected once it exists instead of being silently ignored.
+    """
+    database = sys.modules.get("tracktor.utils.database")
+    if vars(settings) and database is not None and database.engine_created():
+        raise ConfigurationError(
+            "The database engine already exists, configure before first use "
+            "or dispose the engine first"
+        )
+    config.__dict__.update(vars(settings))
@@ -1,6 +1,7 @@
 """
 Module that contains all possible Exceptions
 """
+import math
 from typing import Optional, Dict, Any
 
 from fastapi import HTTPException, status
@@ -16,6 +17,26 @@ class DatabaseConstructionError(Exception):
         super().__init__()
 
 
+class ConfigurationError(Exception):
+    """
+    Error if the configuration can not be changed anymore
+    """
+
+    def __init__(self, message=""):
+        self.message = message
+        super().__init__(message)
+
+
+class BackupError(Exception):
+    """
+    Error if a backup can not be read or restored
+    """
+
+    def __init__(self, message=""):
+        self.message = message
+        super().__init__(message)
+
+
 class ApiError(HTTPException):
     """
     Base exception for all exceptions which could occur in the routers
@@ -107,3 +128,58 @@ class ItemConflictException(ApiError):
             status_code=status.HTTP_409_CONFLICT,
             headers=headers,
         )
+
+
+class PayloadTooLargeException(ApiError):
+    """
+    413 Payload Too Large Response
+    """
+
+    def __init__(
+        self, message: Optional[str] = None, headers: Optional[Dict[str, Any]] = None
+    ):
+        super().__init__(
+            message=message if message else "Payload Too Large",
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            headers=headers,
+        )
+
+
+class UnsupportedMediaTypeException(ApiError):
+    """
+    415 Unsupported Media Type Response
+    """
+
+    def __init__(
+        self, message: Optional[str] = None, headers: Optional[Dict[str, Any]] = None
+    ):
+        super().__init__(
+            message=message if message else "Unsupported Media Type",
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            headers=headers,
+        )
+
+
+class TooManyRequestsException(ApiError):
+    """
+    429 Too Many Requests Response
+    """
+
+    def __init__(
+        self,
+        message: Optional[str] = None,
+        retry_after: Optional[float] = None,
+        headers: Optional[Dict[str, Any]] = None,
+    ):
+        super().__init__(
+            message=message if message else "Too Many Requests",
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            headers={
+                **(headers or {}),
+                **(
+                    {"Retry-After": str(max(1, math.ceil(retry_after)))}
+                    if retry_after is not None
+                    else {}
+                ),
+            },
+        )
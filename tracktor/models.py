@@ -2,15 +2,20 @@
 Module for all models
 """
 import uuid
-from datetime import datetime
-from typing import Optional, List
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, List, Tuple
 
+from sqlalchemy import Column, Float, Table, Text, func, lambda_stmt
+from sqlalchemy.dialects import mysql, postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlmodel import SQLModel, Field, Relationship
 from werkzeug.security import generate_password_hash
 
-from tracktor.error import ItemConflictException
+from tracktor.error import ItemConflictException, ItemNotFoundException
+
+POSITION_GAP = 1 << 16
+REBALANCE_WINDOW = 8
 
 
 class UserCreate(SQLModel):  # pylint: disable=too-few-public-methods
@@ -67,7 +72,11 @@ class User(UserResponse, table=True):
         changed = False
         if name:
             check_user: User = (
-                (await session.execute(select(User).where(User.name == name)))
+                (
+                    await session.execute(
+                        lambda_stmt(lambda: select(User).where(User.name == name))
+                    )
+                )
                 .scalars()
                 .first()
             )
@@ -115,13 +124,21 @@ class User(UserResponse, table=True):
         return user
 
 
+class UserBatchResponse(SQLModel):  # pylint: disable=too-few-public-methods
+    """
+    Users in request order with the entity ids that were not found
+    """
+
+    results: List[Optional[UserResponse]]
+    missing: List[str]
+
+
 class CategoryResponse(SQLModel):  # pylint: disable=too-few-public-methods
     """
     Cleaned category model suitable for a response
     """
 
     name: str
-    playlists: List["Playlist"] = Relationship(back_populates="category")
 
 
 class Category(CategoryResponse, table=True):
@@ -130,6 +147,7 @@ class Category(CategoryResponse, table=True):
     """
 
     id: int = Field(default=None, primary_key=True)
+    playlists: List["Playlist"] = Relationship(back_populates="category")
 
     @staticmethod
     async def create(session: AsyncSession, name: str):
@@ -138,7 +156,9 @@ class Category(CategoryResponse, table=True):
         """
         if (
             category := (
-                await session.execute(select(Category).where(Category.name == name))
+                await session.execute(
+                    lambda_stmt(lambda: select(Category).where(Category.name == name))
+                )
             )
             .scalars()
             .first()
@@ -146,6 +166,8 @@ class Category(CategoryResponse, table=True):
             return category
         category = Category(name=name)
         session.add(category)
+        await session.flush()
+        ChangeLog.record(session, "category", str(category.id))
         await session.commit()
         await session.refresh(category)
         return category
@@ -169,6 +191,195 @@ class Token(SQLModel):  # pylint: disable=too-few-public-methods
     token_type: str
 
 
+class ChangeLog(SQLModel, table=True):
+    """
+    Append-only log of catalog changes used for incremental synchronisation
+    """
+
+    id: int = Field(default=None, primary_key=True)
+    entity_type: str = Field(nullable=False, index=True)
+    entity_id: str = Field(nullable=False, index=True)
+    deleted: bool = Field(default=False, nullable=False)
+    created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
+    @staticmethod
+    def record(session: AsyncSession, entity_type: str, entity_id: str, deleted=False):
+        """
+        Adds a change entry to the session so it is committed with the change itself
+        """
+        session.add(
+            ChangeLog(entity_type=entity_type, entity_id=entity_id, deleted=deleted)
+        )
+
+    @staticmethod
+    def settled(
+        changes: List["ChangeLog"], cursor: int, settle_seconds: float
+    ) -> List["ChangeLog"]:
+        """
+        Returns the changes up to the first gap in their ids. Ids are assigned
+        on flush, so a lower id can still commit after a higher one. A gap is
+        only skipped once the change after it is older than the settle window,
+        then it belongs to a rolled back transaction.
+        """
+        settle = datetime.utcnow() - timedelta(seconds=settle_seconds)
+        for index, change in enumerate(changes):
+            if change.id != cursor + 1 and change.created_at > settle:
+                return changes[:index]
+            cursor = change.id
+        return changes
+
+
+def increment_statement(
+    dialect: str, table: Table, keys: Dict[str, Any], column: str, delta: int
+):
+    """
+    Returns an upsert that adds the delta to the column of the row with the
+    given keys or inserts the row, so concurrent first increments never conflict
+    """
+    if dialect == "mysql":
+        return (
+            mysql.insert(table)
+            .values(**keys, **{column: delta})
+            .on_duplicate_key_update({column: table.c[column] + delta})
+        )
+    return (
+        (postgresql if dialect == "postgresql" else sqlite)
+        .insert(table)
+        .values(**keys, **{column: delta})
+        .on_conflict_do_update(
+            index_elements=list(keys), set_={column: table.c[column] + delta}
+        )
+    )
+
+
+class StatCounter(SQLModel, table=True):
+    """
+    Incrementally maintained catalog statistics
+    """
+
+    kind: str = Field(primary_key=True)
+    key: str = Field(primary_key=True)
+    value: int = Field(default=0, nullable=False)
+
+    @staticmethod
+    async def increment(session: AsyncSession, kind: str, key: str, delta: int = 1):
+        """
+        Adds the delta to a counter inside the running transaction
+        """
+        connection = await session.connection()
+        await session.execute(
+            increment_statement(
+                connection.dialect.name,
+                StatCounter.__table__,
+                {"kind": kind, "key": key},
+                "value",
+                delta,
+            )
+        )
+
+
+class SharedValue(SQLModel, table=True):
+    """
+    Key-value state shared by all workers
+    """
+
+    key: str = Field(primary_key=True)
+    value: str = Field(nullable=False)
+
+    @staticmethod
+    async def get(session: AsyncSession, key: str) -> Optional[str]:
+        """
+        Returns the value stored under the key, always read from the database
+        """
+        if (
+            shared := (
+                await session.execute(
+                    lambda_stmt(
+                        lambda: select(SharedValue).where(SharedValue.key == key)
+                    ),
+                    execution_options={"query_cache": False, "populate_existing": True},
+                )
+            )
+            .scalars()
+            .first()
+        ):
+            return shared.value
+        return None
+
+    @staticmethod
+    async def set(session: AsyncSession, key: str, value: Optional[str]):
+        """
+        Stores the value under the key or removes the key if the value is None
+        """
+        shared = await session.get(SharedValue, key)
+        if value is None:
+            if shared:
+                await session.delete(shared)
+        elif shared:
+            shared.value = value
+            session.add(shared)
+        else:
+            session.add(SharedValue(key=key, value=value))
+        await session.commit()
+
+
+class LoginBucket(SQLModel, table=True):
+    """
+    Token bucket of login attempts shared by all workers
+    """
+
+    key: str = Field(primary_key=True)
+    tokens: float = Field(sa_column=Column(Float(precision=53), nullable=False))
+    updated: float = Field(
+        sa_column=Column(Float(precision=53), nullable=False, index=True)
+    )
+
+
+class LoginFailure(SQLModel, table=True):
+    """
+    Failed login attempt shared by all workers
+    """
+
+    id: int = Field(default=None, primary_key=True)
+    key: str = Field(nullable=False, index=True)
+    failed_at: float = Field(
+        sa_column=Column(Float(precision=53), nullable=False, index=True)
+    )
+
+
+class CacheVersion(SQLModel, table=True):
+    """
+    Write counter per table used to invalidate the caches of other workers
+    """
+
+    table_name: str = Field(primary_key=True)
+    version: int = Field(default=0, nullable=False)
+
+
+class ResponseCache(SQLModel, table=True):
+    """
+    HTTP response kept between link enrichment runs, keyed by the url hash
+    """
+
+    key: str = Field(primary_key=True)
+    status: int = Field(nullable=False)
+    etag: Optional[str] = Field(default=None, index=False)
+    # TEXT is limited to 64 KB on MySQL, pages are kept up to 256 KB
+    body: str = Field(
+        sa_column=Column(Text().with_variant(mysql.MEDIUMTEXT(), "mysql"), nullable=False)
+    )
+    fetched_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
+
+class Tombstone(SQLModel):  # pylint: disable=too-few-public-methods
+    """
+    Marker for an entity that was removed since the sync cursor
+    """
+
+    entity_type: str
+    entity_id: str
+
+
 class PlaylistItemLink(SQLModel, table=True):
     """
     Many-to-Many Table for Playlist and Items
@@ -180,6 +391,7 @@ class PlaylistItemLink(SQLModel, table=True):
     item_id: Optional[int] = Field(
         default=None, foreign_key="item.id", primary_key=True
     )
+    position: int = Field(default=0, nullable=False, index=True)
 
 
 class ItemResponse(SQLModel):
@@ -209,7 +421,11 @@ class Item(ItemResponse, table=True):
         if (
             item := (
                 await session.execute(
-                    select(Item).where(Item.title == title, Item.artist == artist)
+                    lambda_stmt(
+                        lambda: select(Item).where(
+                            Item.title == title, Item.artist == artist
+                        )
+                    )
                 )
             )
             .scalars()
@@ -218,14 +434,41 @@ class Item(ItemResponse, table=True):
             return item
         item = Item(title=title, artist=artist)
         session.add(item)
+        await session.flush()
+        ChangeLog.record(session, "item", str(item.id))
         await session.commit()
         await session.refresh(item)
         return item
 
 
-class PlaylistResponse(SQLModel):
+class PlaylistItemCreate(ItemResponse):  # pylint: disable=too-few-public-methods
     """
-    Cleaned playlist model suitable for a response
+    Incoming model to add a track to a playlist
+    """
+
+    index: Optional[int] = Field(default=None, ge=0)
+
+
+class PlaylistItemMove(SQLModel):  # pylint: disable=too-few-public-methods
+    """
+    Incoming model to move a track inside a playlist
+    """
+
+    index: int = Field(ge=0)
+
+
+async def _count_track(session: AsyncSession, entity_id: str, item: Item, delta: int):
+    """
+    Updates the track, item and artist counters for a changed playlist track
+    """
+    await StatCounter.increment(session, "playlist_tracks", entity_id, delta)
+    await StatCounter.increment(session, "item_playlists", str(item.id), delta)
+    await StatCounter.increment(session, "artist_tracks", item.artist, delta)
+
+
+class PlaylistBase(SQLModel):
+    """
+    Shared playlist fields of the response and the table model
     """
 
     entity_id: str
@@ -233,22 +476,33 @@ class PlaylistResponse(SQLModel):
     spotify: Optional[str]
     amazon: Optional[str]
     apple_music: Optional[str]
-    items: List[ItemResponse]
     image: Optional[str] = None
-    category: Optional[Category] = Relationship(back_populates="playlists")
     release_date: Optional[datetime]
 
 
-class Playlist(PlaylistResponse, table=True):
+class PlaylistResponse(PlaylistBase):
+    """
+    Cleaned playlist model suitable for a response
+    """
+
+    items: List[ItemResponse] = []
+    category: Optional[Category] = None
+
+
+class Playlist(PlaylistBase, table=True):
     """
     Full populated playlist model
     """
 
     id: int = Field(default=None, primary_key=True)
+    entity_id: str = Field(default_factory=lambda: str(uuid.uuid1()), nullable=False)
     items: List[Item] = Relationship(
-        back_populates="playlists", link_model=PlaylistItemLink
+        back_populates="playlists",
+        link_model=PlaylistItemLink,
+        sa_relationship_kwargs={"order_by": "PlaylistItemLink.position"},
     )
     category_id: Optional[int] = Field(default=None, foreign_key="category.id")
+    category: Optional[Category] = Relationship(back_populates="playlists")
 
     @staticmethod
     async def create(  # pylint: disable=too-many-arguments
@@ -272,15 +526,315 @@ class Playlist(PlaylistResponse, table=True):
             apple_music=apple_music,
             image=image,
             release_date=release_date,
+            category_id=category.id if category else None,
         )
         session.add(playlist)
         await session.commit()
         await session.refresh(playlist)
-        playlist.items = [Item.create(session, **x.__dict__) for x in items]
+        for index, new_item in enumerate(items or []):
+            item = await Item.create(session, **new_item.__dict__)
+            session.add(
+                PlaylistItemLink(
+                    playlist_id=playlist.id,
+                    item_id=item.id,
+                    position=(index + 1) * POSITION_GAP,
+                )
+            )
+            await _count_track(session, playlist.entity_id, item, 1)
         if category:
-            playlist.category = category
-
-        session.add(playlist)
+            await StatCounter.increment(
+                session, "category_playlists", str(category.id), 1
+            )
+        ChangeLog.record(session, "playlist", playlist.entity_id)
         await session.commit()
-        await session.refresh(playlist)
         return playlist
+
+    async def _get_link(self, session: AsyncSession, index: int) -> PlaylistItemLink:
+        """
+        Returns the link at the given index of the tracklist
+        """
+        playlist_id = self.id
+        if index >= 0 and (
+            link := (
+                await session.execute(
+                    lambda_stmt(
+                        lambda: select(PlaylistItemLink)
+                        .where(PlaylistItemLink.playlist_id == playlist_id)
+                        .order_by(PlaylistItemLink.position)
+                        .offset(index)
+                        .limit(1)
+                    )
+                )
+            )
+            .scalars()
+            .first()
+        ):
+            return link
+        raise ItemNotFoundException(message="Track not found")
+
+    async def _neighbours(
+        self,
+        session: AsyncSession,
+        index: Optional[int] = None,
+        exclude: Optional[int] = None,
+    ) -> Tuple[Optional[int], Optional[int]]:
+        """
+        Returns the position keys surrounding the given index of the tracklist.
+        Without an index the key of the last track is returned as lower bound.
+        """
+        query = select(PlaylistItemLink.position).where(
+            PlaylistItemLink.playlist_id == self.id
+        )
+        if exclude is not None:
+            query = query.where(PlaylistItemLink.item_id != exclude)
+        if index is not None and index > 0:
+            neighbours = (
+                (
+                    await session.execute(
+                        query.order_by(PlaylistItemLink.position)
+                        .offset(index - 1)
+                        .limit(2)
+                    )
+                )
+                .scalars()
+                .all()
+            )
+            if neighbours:
+                return neighbours[0], (neighbours[1] if len(neighbours) > 1 else None)
+        elif index is not None:
+            return None, (
+                (await session.execute(query.order_by(PlaylistItemLink.position)))
+                .scalars()
+                .first()
+            )
+        return (
+            await session.execute(
+                query.with_only_columns(func.max(PlaylistItemLink.position))
+            )
+        ).scalar(), None
+
+    async def _rebalance(
+        self, session: AsyncSession, around: int, exclude: Optional[int] = None
+    ):
+        """
+        Spreads the position keys of the tracks next to the given position.
+        The window grows until its tracks fit between the surrounding keys,
+        so only a few rows are rewritten instead of the whole tracklist.
+        """
+        query = select(PlaylistItemLink).where(PlaylistItemLink.playlist_id == self.id)
+        if exclude is not None:
+            query = query.where(PlaylistItemLink.item_id != exclude)
+        window = REBALANCE_WINDOW
+        while True:
+            below = (
+                (
+                    await session.execute(
+                        query.where(PlaylistItemLink.position <= around)
+                        .order_by(PlaylistItemLink.position.desc())
+                        .limit(window + 1)
+                    )
+                )
+                .scalars()
+                .all()
+            )
+            above = (
+                (
+                    await session.execute(
+                        query.where(PlaylistItemLink.position > around)
+                        .order_by(PlaylistItemLink.position)
+                        .limit(window + 1)
+                    )
+                )
+                .scalars()
+                .all()
+            )
+            lower = below.pop().position if len(below) > window else None
+            upper = above.pop().position if len(above) > window else None
+            links = list(reversed(below)) + list(above)
+            if upper is None:
+                start = (lower if lower is not None else 0) + POSITION_GAP
+                step = POSITION_GAP
+            elif lower is None:
+                start = upper - POSITION_GAP * len(links)
+                step = POSITION_GAP
+            else:
+                step = (upper - lower) // (len(links) + 1)
+                start = lower + step
+            if step > 1:
+                break
+            window *= 2
+        for offset, link in enumerate(links):
+            link.position = start + offset * step
+            session.add(link)
+        await session.flush()
+
+    async def _place(
+        self, session: AsyncSession, index: Optional[int], item_id: int
+    ) -> int:
+        """
+        Returns a free position key for the given item in front of the given index
+        """
+        lower, upper = await self._neighbours(session, index, exclude=item_id)
+        if lower is not None and upper is not None and upper - lower < 2:
+            await self._rebalance(session, lower, exclude=item_id)
+            lower, upper = await self._neighbours(session, index, exclude=item_id)
+        if upper is None:
+            return (lower or 0) + POSITION_GAP
+        if lower is None:
+            return upper - POSITION_GAP
+        return (lower + upper) // 2
+
+    async def insert_item(
+        self, session: AsyncSession, new_item: ItemResponse, index: Optional[int] = None
+    ):
+        """
+        Inserts a track in front of the given index or appends it to the playlist
+        """
+        item = await Item.create(session, **new_item.__dict__)
+        if await session.get(PlaylistItemLink, (self.id, item.id)):
+            raise ItemConflictException(message="Track already in playlist")
+        session.add(
+            PlaylistItemLink(
+                playlist_id=self.id,
+                item_id=item.id,
+                position=await self._place(session, index, item.id),
+            )
+        )
+        await _count_track(session, self.entity_id, item, 1)
+        ChangeLog.record(session, "playlist", self.entity_id)
+        await session.commit()
+        return item
+
+    async def move_item(self, session: AsyncSession, index: int, new_index: int):
+        """
+        Moves the track at the given index in front of the track at the new index
+        """
+        link = await self._get_link(session, index)
+        link.position = await self._place(session, new_index, link.item_id)
+        session.add(link)
+        ChangeLog.record(session, "playlist", self.entity_id)
+        await session.commit()
+
+    async def remove_item(self, session: AsyncSession, index: int):
+        """
+        Removes the track at the given index from the playlist
+        """
+        link = await self._get_link(session, index)
+        await _count_track(
+            session, self.entity_id, await session.get(Item, link.item_id), -1
+        )
+        await session.delete(link)
+        ChangeLog.record(session, "playlist", self.entity_id)
+        await session.commit()
+
+    async def set_image(self, session: AsyncSession, image: str):
+        """
+        Points the cover of the playlist to the given image url
+        """
+        self.image = image
+        session.add(self)
+        ChangeLog.record(session, "playlist", self.entity_id)
+        await session.commit()
+
+
+class PlaylistLinkResponse(SQLModel):  # pylint: disable=too-few-public-methods
+    """
+    Streaming link of a playlist resolved to its canonical id and metadata
+    """
+
+    provider: str
+    url: str
+    status: str
+    canonical_id: Optional[str] = None
+    canonical_url: Optional[str] = None
+    title: Optional[str] = None
+    image: Optional[str] = None
+    checked_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
+
+class PlaylistLink(PlaylistLinkResponse, table=True):
+    """
+    Full populated playlist link model
+    """
+
+    playlist_id: int = Field(foreign_key="playlist.id", primary_key=True)
+    provider: str = Field(primary_key=True)
+
+
+class PlaylistBatchResponse(SQLModel):  # pylint: disable=too-few-public-methods
+    """
+    Playlists in request order with the entity ids that were not found
+    """
+
+    results: List[Optional[PlaylistResponse]]
+    missing: List[str]
+
+
+class SyncResponse(SQLModel):  # pylint: disable=too-few-public-methods
+    """
+    Changes since a sync cursor
+    """
+
+    cursor: int
+    has_more: bool
+    playlists: List[PlaylistResponse] = []
+    items: List[Item] = []
+    categories: List[Category] = []
+    deleted: List[Tombstone] = []
+
+
+class ImageResponse(SQLModel):  # pylint: disable=too-few-public-methods
+    """
+    Stored image with the urls of its original and derivatives
+    """
+
+    id: str
+    url: str
+    derivatives: List[str]
+
+
+class CacheStatsResponse(SQLModel):  # pylint: disable=too-few-public-methods
+    """
+    Query cache metrics
+    """
+
+    entries: int
+    max_entries: int
+    hits: int
+    misses: int
+    invalidations: int
+
+
+class CategoryStatsResponse(SQLModel):  # pylint: disable=too-few-public-methods
+    """
+    Number of playlists in a category
+    """
+
+    name: str
+    playlists: int
+
+
+class PlaylistStatsResponse(SQLModel):  # pylint: disable=too-few-public-methods
+    """
+    Number of tracks in a playlist
+    """
+
+    entity_id: str
+    tracks: int
+
+
+class ArtistStatsResponse(SQLModel):  # pylint: disable=too-few-public-methods
+    """
+    Number of playlist tracks of an artist
+    """
+
+    artist: str
+    tracks: int
+
+
+class SharedItemStatsResponse(ItemResponse):  # pylint: disable=too-few-public-methods
+    """
+    Number of playlists containing an item
+    """
+
+    playlists: int
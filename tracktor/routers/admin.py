@@ -8,7 +8,7 @@ import re
 import secrets
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Response, status
 from fastapi.logger import logger
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
@@ -21,20 +21,32 @@ from tracktor.error import (
     UnauthorizedException,
     BadRequestException,
 )
-from tracktor.models import User, UserResponse, UserCreate, UserUpdate
+from tracktor.models import (
+    SharedValue,
+    User,
+    UserBatchResponse,
+    UserResponse,
+    UserCreate,
+    UserUpdate,
+)
 from tracktor.utils.auth import (
     current_user,
     get_user,
     admin_required,
     get_user_by_entity_id,
+    get_users_by_entity_ids,
     get_super_admin,
 )
+from tracktor.utils.batch import batch_ids
 from tracktor.utils.database import get_session
+from tracktor.utils.fields import FieldSelection, SparseFields
+from tracktor.utils.logs import audit
 
 PASSWORD_SECURITY = re.compile(
     "((?=.*\\d)(?=.*[a-z])(?=.*[A-Z])(?=.*[_\\-/!@#$%^&*\\\\]).{8,30})"
 )
-ADMIN_PASSWORD_RESET: Optional[str] = None
+ADMIN_PASSWORD_RESET = "admin_password_reset"
+USER_FIELDS = SparseFields(UserResponse)
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -42,24 +54,52 @@ router = APIRouter(prefix="/admin", tags=["admin"])
 @router.get(
     "/user", response_model=List[UserResponse], dependencies=[Depends(admin_required)]
 )
-async def list_all_users(session: AsyncSession = Depends(get_session)):
+async def list_all_users(
+    selection: FieldSelection = Depends(USER_FIELDS),
+    session: AsyncSession = Depends(get_session),
+):
     """
     Request to list all users
     """
-    return [
-        UserResponse(**x.__dict__)
-        for x in (await session.execute(select(User))).scalars().all()
-    ]
+    return selection.response(
+        (await session.execute(select(User).options(*selection.options(User))))
+        .scalars()
+        .all()
+    )
 
 
 @router.get(
     "/user/current", response_model=UserResponse, dependencies=[Depends(current_user)]
 )
-async def get_current_user(request_user: User = Depends(current_user)):
+async def get_current_user(
+    selection: FieldSelection = Depends(USER_FIELDS),
+    request_user: User = Depends(current_user),
+):
     """
     Request to return the current user
     """
-    return UserResponse(**request_user.__dict__)
+    return selection.response(request_user)
+
+
+@router.get(
+    "/user/batch",
+    response_model=UserBatchResponse,
+    dependencies=[Depends(admin_required)],
+)
+async def get_batch_users(
+    ids: List[str] = Depends(batch_ids),
+    selection: FieldSelection = Depends(USER_FIELDS),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Request to return several users by their entity ids
+    """
+    return selection.batch_response(
+        ids,
+        await get_users_by_entity_ids(
+            ids, session, *selection.options(User, "entity_id")
+        ),
+    )
 
 
 @router.get(
@@ -67,12 +107,18 @@ async def get_current_user(request_user: User = Depends(current_user)):
     response_model=UserResponse,
     dependencies=[Depends(admin_required)],
 )
-async def get_single_user(user_id: str, session: AsyncSession = Depends(get_session)):
+async def get_single_user(
+    user_id: str,
+    selection: FieldSelection = Depends(USER_FIELDS),
+    session: AsyncSession = Depends(get_session),
+):
     """
     Request to return a single user
     """
-    if single_user := await get_user_by_entity_id(user_id, session):
-        return UserResponse(**single_user.__dict__)
+    if single_user := await get_user_by_entity_id(
+        user_id, session, *selection.options(User)
+    ):
+        return selection.response(single_user)
     raise ItemNotFoundException(message="User not found")
 
 
@@ -87,7 +133,9 @@ async def create_user(
     """
     if await get_user(new_user.name, session):
         raise ItemConflictException(message="User already exists")
-    return UserResponse(**(await User.create(session, **new_user.__dict__)).__dict__)
+    user = await User.create(session, **new_user.__dict__)
+    audit("user.create", target=user.entity_id, name=user.name, admin=user.admin)
+    return UserResponse(**user.__dict__)
 
 
 @router.put(
@@ -104,9 +152,15 @@ async def update_user(
     if user := await get_user_by_entity_id(user_id, session):
         if user.id == 1:
             raise ForbiddenException(message="Operation not permitted")
-        return UserResponse(
-            **(await user.update(session, **updated_user.__dict__)).__dict__
+        await user.update(session, **updated_user.__dict__)
+        audit(
+            "user.update",
+            target=user_id,
+            fields=sorted(
+                x for x, value in updated_user.__dict__.items() if value is not None
+            ),
         )
+        return UserResponse(**user.__dict__)
     raise ItemNotFoundException(message="User not found")
 
 
@@ -117,28 +171,33 @@ async def reset_admin_password(
     """
     Request to reset the admin password
     """
-    global ADMIN_PASSWORD_RESET  # pylint: disable=global-statement
-    if not ADMIN_PASSWORD_RESET or not token:
-        ADMIN_PASSWORD_RESET = secrets.token_urlsafe(64)
+    reset_token = await SharedValue.get(session, ADMIN_PASSWORD_RESET)
+    if not reset_token or not token:
+        reset_token = secrets.token_urlsafe(64)
+        await SharedValue.set(session, ADMIN_PASSWORD_RESET, reset_token)
         logger.log(
             level=logging.WARNING,
-            msg=f"ADMIN PASSWORD RESET TOKEN: {ADMIN_PASSWORD_RESET}",
+            msg=f"ADMIN PASSWORD RESET TOKEN: {reset_token}",
         )
+        audit("admin.reset_token")
         return {
             "message": "A new reset token was generated. Check the logs of this server"
         }
-    if token != ADMIN_PASSWORD_RESET:
-        ADMIN_PASSWORD_RESET = secrets.token_urlsafe(64)
+    if not secrets.compare_digest(token, reset_token):
+        reset_token = secrets.token_urlsafe(64)
+        await SharedValue.set(session, ADMIN_PASSWORD_RESET, reset_token)
         logger.log(
             level=logging.WARNING,
-            msg=f"ADMIN PASSWORD RESET TOKEN: {ADMIN_PASSWORD_RESET}",
+            msg=f"ADMIN PASSWORD RESET TOKEN: {reset_token}",
         )
+        audit("admin.reset_token", rejected=True)
         raise UnauthorizedException(
             message="Invalid reset token. A new token has been generated"
         )
     admin = await get_super_admin(session)
-    await admin.update(password=config.ADMIN_PASSWORD)
-    ADMIN_PASSWORD_RESET = None
+    await admin.update(session, password=config.ADMIN_PASSWORD)
+    await SharedValue.set(session, ADMIN_PASSWORD_RESET, None)
+    audit("admin.password_reset", target=admin.entity_id)
     return {
         "message": "Admin password is now set to: '"
         + f"{config.ADMIN_PASSWORD}' Change this immediately"
@@ -166,7 +225,9 @@ async def change_password(
             + " including a digit, a lowercase, an uppercase and a special character"
         )
     if user := await get_user(new_password.name, session):
-        return await user.update(session, password=new_password.password)
+        await user.update(session, password=new_password.password)
+        audit("user.password_change", target=user.entity_id)
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
     raise ItemNotFoundException(message="User not found")
 
 
@@ -192,3 +253,5 @@ async def remove_user(
     if delete_user.id == 1:
         raise ItemConflictException(message="Superadmin can not be deleted")
     await delete_user.delete(session)
+    audit("user.delete", target=user_id, name=delete_user.name)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -16,6 +16,8 @@ from tracktor.error import BadRequestException
 from tracktor.models import Token, User
 from tracktor.utils.auth import get_user, create_token
 from tracktor.utils.database import get_session
+from tracktor.utils.throttle import LoginAttempt, login_throttle
+from tracktor.utils.writebehind import write_behind
 
 router = APIRouter(tags=["auth"])
 
@@ -23,6 +25,7 @@ router = APIRouter(tags=["auth"])
 @router.post("/login", response_model=Token)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
+    attempt: LoginAttempt = Depends(login_throttle),
     session: AsyncSession = Depends(get_session),
 ):
     """
@@ -37,8 +40,10 @@ async def login(
         )
     user = await get_user(form_data.username, session)
     if not user or not check_password_hash(user.password, form_data.password):
+        await attempt.failed()
         raise BadRequestException(message="Incorrect username or password")
-    await user.update(session, last_login=datetime.utcnow())
+    await attempt.succeeded()
+    write_behind.record(User, user.id, last_login=datetime.utcnow())
     access_token_expires = timedelta(minutes=config.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_token(
         data={"sub": user.entity_id}, expires_delta=access_token_expires
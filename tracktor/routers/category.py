@@ -0,0 +1,58 @@
+"""
+Module for category router
+
+Contains functions and api endpoints for category listing
+"""
+from typing import List
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from tracktor.error import ItemNotFoundException
+from tracktor.models import Category, PlaylistBase
+from tracktor.utils.database import get_session
+from tracktor.utils.fields import FieldSelection, SparseFields
+
+CATEGORY_FIELDS = SparseFields(Category, relationships={"playlists": PlaylistBase})
+
+router = APIRouter(prefix="/categories", tags=["category"])
+
+
+@router.get("/", response_model=List[Category])
+async def list_categories(
+    selection: FieldSelection = Depends(CATEGORY_FIELDS),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Request to list all categories
+    """
+    return selection.response(
+        (await session.execute(select(Category).options(*selection.options(Category))))
+        .scalars()
+        .all()
+    )
+
+
+@router.get("/{category_id}", response_model=Category)
+async def get_category(
+    category_id: int,
+    selection: FieldSelection = Depends(CATEGORY_FIELDS),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Request to return a single category
+    """
+    if (
+        category := (
+            await session.execute(
+                select(Category)
+                .where(Category.id == category_id)
+                .options(*selection.options(Category))
+            )
+        )
+        .scalars()
+        .first()
+    ):
+        return selection.response(category)
+    raise ItemNotFoundException(message="Category not found")
@@ -0,0 +1,50 @@
+"""
+Module for events router
+
+Contains functions and api endpoints for streaming catalog changes
+"""
+import asyncio
+import json
+
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+
+from tracktor.config import config
+from tracktor.utils.events import hub
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+
+async def _stream():
+    subscriber = hub.subscribe()
+    try:
+        yield f"retry: {config.EVENT_HEARTBEAT_SECONDS * 1000}\n\n"
+        while not subscriber.dropped or not subscriber.queue.empty():
+            try:
+                change = await asyncio.wait_for(
+                    subscriber.queue.get(), timeout=config.EVENT_HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield (
+                f"id: {change['id']}\n"
+                f"event: {change['entity_type']}\n"
+                f"data: {json.dumps(change)}\n\n"
+            )
+    finally:
+        hub.unsubscribe(subscriber)
+
+
+@router.get("/")
+async def stream_events():
+    """
+    Request to stream committed playlist, item and category changes as server-sent
+    events. The event id is the sync cursor, so a client that got disconnected can
+    catch up through the sync endpoint.
+    """
+    return StreamingResponse(
+        _stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
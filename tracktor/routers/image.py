@@ -0,0 +1,58 @@
+"""
+Module for image router
+
+Contains api endpoints for uploading and serving images
+"""
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Depends, File, Request, Response, UploadFile, status
+from fastapi.responses import FileResponse
+
+from tracktor.error import ItemNotFoundException
+from tracktor.models import ImageResponse
+from tracktor.utils.auth import current_user
+from tracktor.utils.images import IMMUTABLE, MEDIA_TYPES, image_store, read_upload
+
+router = APIRouter(prefix="/images", tags=["image"])
+
+
+def _serve(request: Request, image_id: str, name: Optional[str] = None) -> Response:
+    if not (path := image_store.path(image_id, name)):
+        raise ItemNotFoundException(message="Image not found")
+    etag = f'"{image_id}-{name}"' if name else f'"{image_id}"'
+    headers = {"Cache-Control": IMMUTABLE, "ETag": etag}
+    if etag in (
+        x.strip().removeprefix("W/")
+        for x in request.headers.get("if-none-match", "").split(",")
+    ):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return FileResponse(
+        path,
+        media_type=MEDIA_TYPES[os.path.splitext(path)[1][1:]],
+        headers=headers,
+    )
+
+
+@router.post("/", response_model=ImageResponse, dependencies=[Depends(current_user)])
+async def upload_image(file: UploadFile = File(...)):
+    """
+    Request to store an image and its resized derivatives
+    """
+    return await image_store.store(await read_upload(file))
+
+
+@router.get("/{image_id}")
+async def get_image(image_id: str, request: Request):
+    """
+    Request to return the original of an image
+    """
+    return _serve(request, image_id)
+
+
+@router.get("/{image_id}/{name}")
+async def get_image_derivative(image_id: str, name: str, request: Request):
+    """
+    Request to return a resized derivative like 320.webp of an image
+    """
+    return _serve(request, image_id, name)
@@ -0,0 +1,196 @@
+"""
+Module for playlist router
+
+Contains functions and api endpoints for playlist management
+"""
+from typing import List
+
+from fastapi import APIRouter, Depends, File, Response, UploadFile, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import noload, selectinload
+
+from tracktor.error import ItemNotFoundException
+from tracktor.models import (
+    Category,
+    ImageResponse,
+    Playlist,
+    PlaylistBatchResponse,
+    PlaylistResponse,
+    PlaylistItemCreate,
+    PlaylistItemMove,
+    PlaylistLink,
+    PlaylistLinkResponse,
+    ItemResponse,
+)
+from tracktor.utils.auth import current_user
+from tracktor.utils.batch import batch_ids
+from tracktor.utils.database import get_session
+from tracktor.utils.fields import FieldSelection, SparseFields
+from tracktor.utils.images import image_store, read_upload
+
+PLAYLIST_FIELDS = SparseFields(
+    PlaylistResponse,
+    relationships={"items": ItemResponse, "category": Category},
+    default_include=("items", "category"),
+)
+
+router = APIRouter(prefix="/playlists", tags=["playlist"])
+
+
+async def _get_playlist(entity_id: str, session: AsyncSession, *options) -> Playlist:
+    if (
+        playlist := (
+            await session.execute(
+                select(Playlist)
+                .where(Playlist.entity_id == entity_id)
+                .options(
+                    *(
+                        options
+                        or (selectinload(Playlist.items), selectinload(Playlist.category))
+                    )
+                )
+                .execution_options(populate_existing=True)
+            )
+        )
+        .scalars()
+        .first()
+    ):
+        return playlist
+    raise ItemNotFoundException(message="Playlist not found")
+
+
+@router.get("/", response_model=PlaylistBatchResponse)
+async def get_batch_playlists(
+    ids: List[str] = Depends(batch_ids),
+    selection: FieldSelection = Depends(PLAYLIST_FIELDS),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Request to return several playlists by their entity ids
+    """
+    return selection.batch_response(
+        ids,
+        (
+            await session.execute(
+                select(Playlist)
+                .where(Playlist.entity_id.in_(set(ids)))
+                .options(*selection.options(Playlist, "entity_id"))
+            )
+        )
+        .scalars()
+        .all(),
+    )
+
+
+@router.get("/{playlist_id}", response_model=PlaylistResponse)
+async def get_playlist(
+    playlist_id: str,
+    selection: FieldSelection = Depends(PLAYLIST_FIELDS),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Request to return a single playlist with its ordered tracklist
+    """
+    return selection.response(
+        await _get_playlist(playlist_id, session, *selection.options(Playlist))
+    )
+
+
+@router.get("/{playlist_id}/links", response_model=List[PlaylistLinkResponse])
+async def get_playlist_links(
+    playlist_id: str, session: AsyncSession = Depends(get_session)
+):
+    """
+    Request to return the resolved streaming links of a playlist
+    """
+    playlist = await _get_playlist(
+        playlist_id, session, noload(Playlist.items), noload(Playlist.category)
+    )
+    return (
+        (
+            await session.execute(
+                select(PlaylistLink)
+                .where(PlaylistLink.playlist_id == playlist.id)
+                .order_by(PlaylistLink.provider)
+            )
+        )
+        .scalars()
+        .all()
+    )
+
+
+@router.post(
+    "/{playlist_id}/items",
+    response_model=PlaylistResponse,
+    dependencies=[Depends(current_user)],
+)
+async def insert_playlist_item(
+    playlist_id: str,
+    new_item: PlaylistItemCreate,
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Request to insert a track in front of the given index or append it
+    """
+    playlist = await _get_playlist(playlist_id, session)
+    await playlist.insert_item(
+        session,
+        ItemResponse(title=new_item.title, artist=new_item.artist),
+        index=new_item.index,
+    )
+    return PlaylistResponse(**(await _get_playlist(playlist_id, session)).__dict__)
+
+
+@router.put(
+    "/{playlist_id}/items/{index}",
+    response_model=PlaylistResponse,
+    dependencies=[Depends(current_user)],
+)
+async def move_playlist_item(
+    playlist_id: str,
+    index: int,
+    move: PlaylistItemMove,
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Request to move the track at the given index to a new index
+    """
+    playlist = await _get_playlist(playlist_id, session)
+    await playlist.move_item(session, index, move.index)
+    return PlaylistResponse(**(await _get_playlist(playlist_id, session)).__dict__)
+
+
+@router.delete(
+    "/{playlist_id}/items/{index}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(current_user)],
+)
+async def remove_playlist_item(
+    playlist_id: str, index: int, session: AsyncSession = Depends(get_session)
+):
+    """
+    Request to remove the track at the given index
+    """
+    playlist = await _get_playlist(playlist_id, session)
+    await playlist.remove_item(session, index)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.put(
+    "/{playlist_id}/image",
+    response_model=ImageResponse,
+    dependencies=[Depends(current_user)],
+)
+async def upload_playlist_image(
+    playlist_id: str,
+    file: UploadFile = File(...),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Request to upload a new cover for the playlist
+    """
+    playlist = await _get_playlist(playlist_id, session, noload(Playlist.items))
+    image = await image_store.store(await read_upload(file))
+    await playlist.set_image(session, image.url)
+    return image
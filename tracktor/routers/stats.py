@@ -0,0 +1,150 @@
+"""
+Module for stats router
+
+Contains functions and api endpoints for catalog statistics
+"""
+from typing import List
+
+from fastapi import APIRouter, Depends, Query, Response, status
+from sqlalchemy import String, and_, cast
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from tracktor.models import (
+    ArtistStatsResponse,
+    CacheStatsResponse,
+    Category,
+    CategoryStatsResponse,
+    Item,
+    PlaylistStatsResponse,
+    SharedItemStatsResponse,
+    StatCounter,
+)
+from tracktor.utils.auth import admin_required
+from tracktor.utils.cache import query_cache
+from tracktor.utils.database import get_session
+from tracktor.utils.logs import audit
+from tracktor.utils.stats import rebuild_stats
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+
+def _top(kind: str, limit: int, minimum: int = 1):
+    return (
+        select(StatCounter)
+        .where(StatCounter.kind == kind, StatCounter.value >= minimum)
+        .order_by(StatCounter.value.desc(), StatCounter.key)
+        .limit(limit)
+    )
+
+
+@router.get("/categories", response_model=List[CategoryStatsResponse])
+async def category_stats(session: AsyncSession = Depends(get_session)):
+    """
+    Request to return the number of playlists per category
+    """
+    return [
+        CategoryStatsResponse(name=name, playlists=value)
+        for name, value in (
+            await session.execute(
+                select(Category.name, StatCounter.value)
+                .join(
+                    StatCounter,
+                    and_(
+                        StatCounter.kind == "category_playlists",
+                        StatCounter.key == cast(Category.id, String),
+                    ),
+                )
+                .order_by(StatCounter.value.desc(), Category.name)
+            )
+        ).all()
+    ]
+
+
+@router.get("/playlists", response_model=List[PlaylistStatsResponse])
+async def playlist_stats(
+    limit: int = Query(10, ge=1, le=100), session: AsyncSession = Depends(get_session)
+):
+    """
+    Request to return the playlists with the most tracks
+    """
+    return [
+        PlaylistStatsResponse(entity_id=x.key, tracks=x.value)
+        for x in (await session.execute(_top("playlist_tracks", limit))).scalars()
+    ]
+
+
+@router.get("/artists", response_model=List[ArtistStatsResponse])
+async def artist_stats(
+    limit: int = Query(10, ge=1, le=100), session: AsyncSession = Depends(get_session)
+):
+    """
+    Request to return the artists with the most playlist tracks
+    """
+    return [
+        ArtistStatsResponse(artist=x.key, tracks=x.value)
+        for x in (await session.execute(_top("artist_tracks", limit))).scalars()
+    ]
+
+
+@router.get("/items/shared", response_model=List[SharedItemStatsResponse])
+async def shared_item_stats(
+    limit: int = Query(10, ge=1, le=100), session: AsyncSession = Depends(get_session)
+):
+    """
+    Request to return the items that appear in more than one playlist
+    """
+    counters = (
+        (await session.execute(_top("item_playlists", limit, minimum=2)))
+        .scalars()
+        .all()
+    )
+    items = {
+        x.id: x
+        for x in (
+            await session.execute(
+                select(Item).where(Item.id.in_([int(x.key) for x in counters]))
+            )
+        ).scalars()
+    }
+    return [
+        SharedItemStatsResponse(
+            title=items[int(x.key)].title,
+            artist=items[int(x.key)].artist,
+            playlists=x.value,
+        )
+        for x in counters
+        if int(x.key) in items
+    ]
+
+
+@router.get(
+    "/cache",
+    response_model=CacheStatsResponse,
+    dependencies=[Depends(admin_required)],
+)
+async def cache_stats():
+    """
+    Request to return the hit and miss counters of the query cache
+    """
+    return CacheStatsResponse(
+        entries=len(query_cache),
+        max_entries=query_cache.max_entries,
+        hits=query_cache.hits,
+        misses=query_cache.misses,
+        invalidations=query_cache.invalidations,
+    )
+
+
+@router.post(
+    "/rebuild",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(admin_required)],
+)
+async def rebuild(session: AsyncSession = Depends(get_session)):
+    """
+    Request to recount all statistics from the catalog
+    """
+    await rebuild_stats(session)
+    audit("stats.rebuild")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
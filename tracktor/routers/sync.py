@@ -0,0 +1,106 @@
+"""
+Module for sync router
+
+Contains functions and api endpoints for incremental catalog synchronisation
+"""
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
+
+from tracktor.config import config
+from tracktor.models import (
+    Category,
+    ChangeLog,
+    Item,
+    Playlist,
+    PlaylistResponse,
+    SyncResponse,
+    Tombstone,
+)
+from tracktor.utils.database import get_session
+
+SYNC_PAGE_SIZE = 500
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+
+@router.get("/", response_model=SyncResponse)
+async def sync(
+    since: int = Query(0, ge=0),
+    limit: int = Query(SYNC_PAGE_SIZE, ge=1, le=SYNC_PAGE_SIZE),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Request to return all playlists, items and categories changed after the cursor
+    """
+    page = (
+        (
+            await session.execute(
+                select(ChangeLog)
+                .where(ChangeLog.id > since)
+                .order_by(ChangeLog.id)
+                .limit(limit)
+            )
+        )
+        .scalars()
+        .all()
+    )
+    changes = ChangeLog.settled(page, since, config.CHANGELOG_SETTLE_SECONDS)
+    latest = {(x.entity_type, x.entity_id): x.deleted for x in changes}
+    changed = {"playlist": [], "item": [], "category": []}
+    for (entity_type, entity_id), deleted in latest.items():
+        if not deleted:
+            changed[entity_type].append(entity_id)
+    response = SyncResponse(
+        cursor=changes[-1].id if changes else since,
+        has_more=len(page) == limit or len(changes) < len(page),
+    )
+    if changed["playlist"]:
+        response.playlists = [
+            PlaylistResponse(**x.__dict__)
+            for x in (
+                await session.execute(
+                    select(Playlist)
+                    .where(Playlist.entity_id.in_(changed["playlist"]))
+                    .options(
+                        selectinload(Playlist.items), selectinload(Playlist.category)
+                    )
+                )
+            )
+            .scalars()
+            .all()
+        ]
+    if changed["item"]:
+        response.items = (
+            (
+                await session.execute(
+                    select(Item).where(Item.id.in_([int(x) for x in changed["item"]]))
+                )
+            )
+            .scalars()
+            .all()
+        )
+    if changed["category"]:
+        response.categories = (
+            (
+                await session.execute(
+                    select(Category).where(
+                        Category.id.in_([int(x) for x in changed["category"]])
+                    )
+                )
+            )
+            .scalars()
+            .all()
+        )
+    found = (
+        {("playlist", x.entity_id) for x in response.playlists}
+        | {("item", str(x.id)) for x in response.items}
+        | {("category", str(x.id)) for x in response.categories}
+    )
+    response.deleted = [
+        Tombstone(entity_type=entity_type, entity_id=entity_id)
+        for (entity_type, entity_id) in latest
+        if (entity_type, entity_id) not in found
+    ]
+    return response
@@ -3,43 +3,30 @@ Module for version router
 
 Contains functions and api endpoints for version listing
 """
-import sys
-from operator import attrgetter
 from typing import List
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 
 from tracktor.error import ItemNotFoundException
 from tracktor.models import VersionModel
+from tracktor.utils.versions import registry
 
 router = APIRouter(prefix="/versions", tags=["version"])
 
 
-def _get_versions() -> List[VersionModel]:
-    return [
-        VersionModel(
-            version=x,
-            changelog=attrgetter(f"{x}.__CHANGELOG__")(sys.modules["tracktor.routers"]),
-        )
-        for x in dir(sys.modules[__package__])
-        if x.startswith("v") and x != "version" and x != "version_router"
-    ]
-
-
 @router.get("/", response_model=List[VersionModel])
-async def list_versions():
+async def list_versions(request: Request):
     """
     Request to list all versions
     """
-    return _get_versions()
+    return registry.listing.response(request)
 
 
-@router.get("/latest")
-async def latest_version():
+@router.get("/latest", response_model=str)
+async def latest_version(request: Request):
     """
     Request to return the latest version
     """
-    try:
-        return sorted([x.version for x in _get_versions()])[0]
-    except IndexError as err:
-        raise ItemNotFoundException from err
+    if not registry.latest:
+        raise ItemNotFoundException
+    return registry.latest.response(request)
@@ -2,10 +2,11 @@
 Module that contains authorisation functions
 """
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import List, Optional
 
 from fastapi import Depends
 from jose import jwt, JWTError
+from sqlalchemy import lambda_stmt
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
@@ -13,6 +14,7 @@ from tracktor.config import config
 from tracktor.error import UnauthorizedException, ForbiddenException
 from tracktor.models import User
 from tracktor.utils.database import get_session
+from tracktor.utils.logs import set_request_user
 
 
 async def get_user(username: str, session: AsyncSession) -> Optional[User]:
@@ -20,30 +22,62 @@ async def get_user(username: str, session: AsyncSession) -> Optional[User]:
     Returns a user with the given username
     """
     return (
-        (await session.execute(select(User).where(User.name == username)))
+        (
+            await session.execute(
+                lambda_stmt(lambda: select(User).where(User.name == username))
+            )
+        )
         .scalars()
         .first()
     )
 
 
 async def get_user_by_entity_id(
-    entity_id: str, session: AsyncSession
+    entity_id: str, session: AsyncSession, *options
 ) -> Optional[User]:
     """
-    Returns a user with the given entity_id
+    Returns a user with the given entity_id. Without loader options the
+    statement is built once and only its parameter changes between calls.
     """
     return (
-        (await session.execute(select(User).where(User.entity_id == entity_id)))
+        (
+            await session.execute(
+                select(User).where(User.entity_id == entity_id).options(*options)
+                if options
+                else lambda_stmt(lambda: select(User).where(User.entity_id == entity_id))
+            )
+        )
         .scalars()
         .first()
     )
 
 
+async def get_users_by_entity_ids(
+    entity_ids: List[str], session: AsyncSession, *options
+) -> List[User]:
+    """
+    Returns all users with one of the given entity_ids
+    """
+    return (
+        (
+            await session.execute(
+                select(User).where(User.entity_id.in_(set(entity_ids))).options(*options)
+            )
+        )
+        .scalars()
+        .all()
+    )
+
+
 async def get_super_admin(session: AsyncSession):
     """
     Returns the admin user with id 1
     """
-    return (await session.execute(select(User).where(User.id == 1))).scalars().first()
+    return (
+        (await session.execute(lambda_stmt(lambda: select(User).where(User.id == 1))))
+        .scalars()
+        .first()
+    )
 
 
 async def decode_token(token, session: AsyncSession):
@@ -73,7 +107,9 @@ async def current_user(
     """
     Returns the current user
     """
-    return await decode_token(token, session)
+    user = await decode_token(token, session)
+    set_request_user(user.entity_id)
+    return user
 
 
 def create_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -0,0 +1,257 @@
+"""
+Module for streaming backups of the whole database
+
+A backup is a gzip compressed NDJSON file. The first line describes the
+archive, then every table follows as one line with its column names and one
+line per row holding the values in the same order. Tables are written in
+dependency order, so a restore can insert them one after another into any
+supported database.
+"""
+import gzip
+import json
+import time
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import Column, Date, DateTime, MetaData, String, Table, func, inspect
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from sqlalchemy.future import select
+from sqlalchemy.schema import CreateTable
+from sqlmodel import SQLModel
+
+import tracktor.models  # noqa: F401 pylint: disable=unused-import
+from tracktor.error import BackupError
+
+FORMAT = "tracktor-backup"
+FORMAT_VERSION = 1
+ALEMBIC_VERSION = Table(
+    "alembic_version",
+    MetaData(),
+    Column("version_num", String(32), primary_key=True),
+)
+
+
+@dataclass
+class TableReport:
+    """
+    Number of rows and seconds needed for one table
+    """
+
+    table: str
+    rows: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        """
+        Throughput of the table
+        """
+        return self.rows / self.seconds if self.seconds else float(self.rows)
+
+
+def _encode(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Can not serialize {type(value).__name__}")
+
+
+def _decoder(column: Column) -> Optional[Callable]:
+    if isinstance(column.type, DateTime):
+        return datetime.fromisoformat
+    if isinstance(column.type, Date):
+        return date.fromisoformat
+    return None
+
+
+async def _revision(connection: AsyncConnection) -> Optional[str]:
+    if not await connection.run_sync(
+        lambda x: inspect(x).has_table(ALEMBIC_VERSION.name)
+    ):
+        return None
+    return (await connection.execute(select(ALEMBIC_VERSION.c.version_num))).scalar()
+
+
+async def dump(engine: AsyncEngine, path: str, chunk_size: int) -> List[TableReport]:
+    """
+    Streams every table into a backup file using server side cursors, all
+    tables are read from the same snapshot
+    """
+    reports = []
+    options = {}
+    if engine.sync_engine.dialect.name != "sqlite":
+        options["isolation_level"] = "REPEATABLE READ"
+    async with engine.connect() as connection:
+        connection = await connection.execution_options(**options)
+        async with connection.begin():
+            if engine.sync_engine.dialect.name == "sqlite":
+                # The sqlite driver only begins a transaction before writes,
+                # without it every table would be read at another point in time
+                await connection.exec_driver_sql("BEGIN")
+            with gzip.open(path, "wt", encoding="utf-8") as archive:
+                archive.write(
+                    json.dumps(
+                        {
+                            "format": FORMAT,
+                            "version": FORMAT_VERSION,
+                            "revision": await _revision(connection),
+                        }
+                    )
+                    + "\n"
+                )
+                for table in SQLModel.metadata.sorted_tables:
+                    started, rows = time.perf_counter(), 0
+                    archive.write(
+                        json.dumps({"table": table.name, "columns": table.c.keys()})
+                        + "\n"
+                    )
+                    result = await connection.stream(
+                        select(table).order_by(*table.primary_key.columns)
+                    )
+                    async for chunk in result.partitions(chunk_size):
+                        archive.writelines(
+                            json.dumps(list(x), default=_encode) + "\n" for x in chunk
+                        )
+                        rows += len(chunk)
+                    reports.append(
+                        TableReport(table.name, rows, time.perf_counter() - started)
+                    )
+    return reports
+
+
+def _read(path: str) -> Tuple[Dict, Iterator[Dict]]:
+    archive = gzip.open(path, "rt", encoding="utf-8")
+    header = json.loads(archive.readline() or "{}")
+    if header.get("format") != FORMAT or header.get("version") != FORMAT_VERSION:
+        archive.close()
+        raise BackupError(f"{path} is not a tracktor backup")
+
+    def lines():
+        with archive:
+            for line in archive:
+                yield json.loads(line)
+
+    return header, lines()
+
+
+async def _prepare(connection: AsyncConnection, header: Dict):
+    existing = set(
+        await connection.run_sync(lambda x: inspect(x).get_table_names())
+    )
+    for table in SQLModel.metadata.sorted_tables:
+        if table.name not in existing:
+            await connection.execute(CreateTable(table))
+            continue
+        if (await connection.execute(select(func.count()).select_from(table))).scalar():
+            raise BackupError(f"Table {table.name} is not empty")
+        for index in table.indexes:
+            await connection.run_sync(index.drop)
+    revision = await _revision(connection)
+    if revision is None and header["revision"]:
+        await connection.run_sync(ALEMBIC_VERSION.create, checkfirst=True)
+        await connection.execute(
+            ALEMBIC_VERSION.insert().values(version_num=header["revision"])
+        )
+    elif header["revision"] and revision != header["revision"]:
+        raise BackupError(
+            f"Backup has revision {header['revision']}, database has {revision}"
+        )
+
+
+def _reset_sequence(connection: AsyncConnection, table: Table, column: Column):
+    # The table name is passed as text, so it has to be quoted for reserved
+    # words like user
+    sequence = func.pg_get_serial_sequence(
+        connection.dialect.identifier_preparer.quote(table.name), column.name
+    )
+    return select(
+        func.setval(sequence, func.coalesce(func.max(column), 0) + 1, False)
+    ).select_from(table)
+
+
+async def _finish(connection: AsyncConnection):
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            await connection.run_sync(index.create)
+        # pylint: disable=protected-access
+        if connection.dialect.name == "postgresql" and (
+            column := table._autoincrement_column
+        ) is not None:
+            await connection.execute(_reset_sequence(connection, table, column))
+
+
+class _Loader:
+    """
+    Inserts the rows of one table after another in batches
+    """
+
+    def __init__(self, connection: AsyncConnection, batch_size: int):
+        self.connection = connection
+        self.batch_size = batch_size
+        self.reports: List[TableReport] = []
+        self._table: Optional[Table] = None
+        self._columns: List[Tuple[str, Optional[Callable]]] = []
+        self._batch: List[Dict] = []
+        self._report: Optional[TableReport] = None
+
+    async def begin(self, name: str, columns: List[str]):
+        """
+        Finishes the current table and starts loading the next one
+        """
+        await self.end()
+        if name not in SQLModel.metadata.tables:
+            raise BackupError(f"Unknown table {name}")
+        self._table = SQLModel.metadata.tables[name]
+        self._columns = [(x, _decoder(self._table.c[x])) for x in columns]
+        self._report = TableReport(name, 0, time.perf_counter())
+
+    async def add(self, values: List):
+        """
+        Buffers one row and inserts the batch once it is full
+        """
+        if self._table is None:
+            raise BackupError("Row without table")
+        self._batch.append(
+            {
+                name: decode(value) if decode and value is not None else value
+                for (name, decode), value in zip(self._columns, values)
+            }
+        )
+        self._report.rows += 1
+        if len(self._batch) >= self.batch_size:
+            await self._flush()
+
+    async def end(self):
+        """
+        Inserts the remaining rows of the current table
+        """
+        if self._table is None:
+            return
+        await self._flush()
+        self._report.seconds = time.perf_counter() - self._report.seconds
+        self.reports.append(self._report)
+        self._table = None
+
+    async def _flush(self):
+        if self._batch:
+            await self.connection.execute(self._table.insert(), self._batch)
+            self._batch = []
+
+
+async def restore(engine: AsyncEngine, path: str, batch_size: int) -> List[TableReport]:
+    """
+    Loads a backup into an empty database with batched inserts, indexes are
+    only built once all rows are inserted
+    """
+    header, lines = _read(path)
+    async with engine.begin() as connection:
+        await _prepare(connection, header)
+        loader = _Loader(connection, batch_size)
+        for line in lines:
+            if isinstance(line, dict):
+                await loader.begin(line["table"], line["columns"])
+            else:
+                await loader.add(line)
+        await loader.end()
+        await _finish(connection)
+    return loader.reports
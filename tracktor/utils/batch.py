@@ -0,0 +1,27 @@
+"""
+Module for batch reads by identifiers
+"""
+from typing import List
+
+from fastapi import Query
+
+from tracktor.config import config
+from tracktor.error import BadRequestException
+
+
+def batch_ids(
+    ids: List[str] = Query(
+        ..., description="Comma separated or repeated identifiers to fetch"
+    )
+) -> List[str]:
+    """
+    Returns the requested identifiers in request order
+    """
+    requested = [x.strip() for value in ids for x in value.split(",") if x.strip()]
+    if not requested:
+        raise BadRequestException(message="No identifiers given")
+    if len(set(requested)) > config.MAX_BATCH_SIZE:
+        raise BadRequestException(
+            message=f"At most {config.MAX_BATCH_SIZE} identifiers can be requested"
+        )
+    return requested
@@ -0,0 +1,186 @@
+"""
+Module for caching query results with table based invalidation
+
+Every ORM select executed through a session is cached under its statement
+cache key and bound parameters. Each entry is tagged with the tables it read,
+including the tables of eagerly loaded relationships, and dropped as soon as a
+committed flush or bulk statement touches one of those tables. Results are
+stored pickled, so every hit merges its own detached copy into the session.
+"""
+import pickle
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Dict, Hashable, Optional, Set
+
+from sqlalchemy import Table, event
+from sqlalchemy.orm import RelationshipProperty, Session, loading, object_mapper
+from sqlalchemy.sql import visitors
+
+from tracktor.config import config
+
+_READ_TABLES: ContextVar[Optional[Set[str]]] = ContextVar("_READ_TABLES", default=None)
+
+
+class QueryCache:
+    """
+    Bounded LRU store of frozen query results with hit and miss counters.
+    Without a size the configured QUERY_CACHE_SIZE is used.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self._max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries: Dict[Hashable, tuple] = OrderedDict()
+        self._versions: Dict[str, int] = {}
+
+    @property
+    def max_entries(self) -> int:
+        """
+        Maximum number of cached results
+        """
+        if self._max_entries is None:
+            return config.QUERY_CACHE_SIZE
+        return self._max_entries
+
+    def get(self, key: Hashable):
+        """
+        Returns the cached frozen result or None
+        """
+        if (entry := self._entries.get(key)) is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def versions(self) -> Dict[str, int]:
+        """
+        Returns a snapshot of the invalidation counter of every table
+        """
+        return dict(self._versions)
+
+    def set(self, key: Hashable, tables: Set[str], frozen, versions: Dict[str, int]):
+        """
+        Stores a result unless one of its tables was invalidated since the snapshot
+        """
+        if any(self._versions.get(x, 0) != versions.get(x, 0) for x in tables):
+            return
+        self._entries[key] = (frozenset(tables), frozen)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, tables: Set[str]):
+        """
+        Drops every entry that read one of the given tables
+        """
+        if not tables:
+            return
+        for table in tables:
+            self._versions[table] = self._versions.get(table, 0) + 1
+        for key in [k for k, (tags, _) in self._entries.items() if tags & tables]:
+            del self._entries[key]
+            self.invalidations += 1
+
+    def clear(self):
+        """
+        Drops all entries
+        """
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _tables(statement) -> Set[str]:
+    return {x.name for x in visitors.iterate(statement) if isinstance(x, Table)}
+
+
+def _key(orm_context) -> Hashable:
+    cache_key = orm_context.statement._generate_cache_key()  # pylint: disable=protected-access
+    return (
+        cache_key.key,
+        repr([x.effective_value for x in cache_key.bindparams]),
+        repr(orm_context.parameters),
+    )
+
+
+query_cache = QueryCache()
+
+
+def _execute(orm_context):
+    session = orm_context.session
+    tables = _tables(orm_context.statement)
+    if orm_context.is_relationship_load:
+        tables.update(
+            x.secondary.name
+            for x in orm_context.loader_strategy_path.path
+            if isinstance(x, RelationshipProperty) and x.secondary is not None
+        )
+    if not orm_context.is_select:
+        session.info.setdefault("cache_tables", set()).update(tables)
+        return None
+    if (outer := _READ_TABLES.get()) is not None:
+        outer.update(tables)
+    if (
+        orm_context.is_column_load
+        or orm_context.is_relationship_load
+        or orm_context.execution_options.get("query_cache") is False
+        or orm_context.statement._for_update_arg is not None  # pylint: disable=protected-access
+        or tables & session.info.get("cache_tables", set())
+    ):
+        return None
+    key = _key(orm_context)
+    if (frozen := query_cache.get(key)) is None:
+        versions = query_cache.versions()
+        read_tables = set(tables)
+        token = _READ_TABLES.set(read_tables)
+        try:
+            result = orm_context.invoke_statement().freeze()
+        finally:
+            _READ_TABLES.reset(token)
+        if outer is not None:
+            outer.update(read_tables)
+        # The frozen result holds the live instances of this session, only a
+        # pickled copy is detached from its later changes and rollbacks
+        query_cache.set(key, read_tables, pickle.dumps(result), versions)
+        return result()
+    return loading.merge_frozen_result(
+        session, orm_context.statement, pickle.loads(frozen), load=False
+    )()
+
+
+def _collect(session: Session, _flush_context):
+    session.info.setdefault("cache_tables", set()).update(
+        table.name
+        for instance in (*session.new, *session.dirty, *session.deleted)
+        for table in object_mapper(instance).tables
+    )
+
+
+def _invalidate(session: Session):
+    query_cache.invalidate(session.info.pop("cache_tables", set()))
+
+
+def _discard(session: Session):
+    session.info.pop("cache_tables", None)
+
+
+LISTENERS = (
+    ("do_orm_execute", _execute),
+    ("after_flush", _collect),
+    ("after_commit", _invalidate),
+    ("after_rollback", _discard),
+)
+
+
+def install_query_cache():
+    """
+    Registers the session events that serve selects from the cache and
+    invalidate it on writes
+    """
+    for name, listener in LISTENERS:
+        if not event.contains(Session, name, listener):
+            event.listen(Session, name, listener)
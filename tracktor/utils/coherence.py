@@ -0,0 +1,242 @@
+"""
+Module for keeping the caches and event streams of several workers coherent
+
+Every transaction that writes to a table increments the row of that table in
+the cacheversion table when it commits. Each worker watches those versions and drops its own
+cache entries of changed tables. On PostgreSQL a NOTIFY wakes the watchers
+right after the commit, other databases are polled in a short interval.
+The same watcher publishes change log entries committed by other workers to
+the local event hub.
+"""
+import asyncio
+import logging
+from typing import Dict, Optional, Set
+
+from fastapi.logger import logger
+from sqlalchemy import Table, event, func, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.future import select
+from sqlalchemy.orm import Session, object_mapper
+from sqlalchemy.sql import visitors
+from sqlmodel import SQLModel
+
+from tracktor.config import config
+from tracktor.models import CacheVersion, ChangeLog, increment_statement
+from tracktor.utils.cache import query_cache
+from tracktor.utils.database import get_engine
+from tracktor.utils.events import hub
+from tracktor.utils.tasks import BackgroundTask
+
+CHANNEL = "tracktor_cache"
+_VERSIONS: Table = CacheVersion.__table__
+_CHANGES: Table = ChangeLog.__table__
+
+
+def _bump(connection, tables: Set[str]):
+    tables = tables - {_VERSIONS.name}
+    for table in sorted(tables):
+        connection.execute(
+            increment_statement(
+                connection.dialect.name,
+                _VERSIONS,
+                {"table_name": table},
+                "version",
+                1,
+            )
+        )
+    if tables and connection.dialect.name == "postgresql":
+        connection.execute(
+            text("SELECT pg_notify(:channel, :tables)"),
+            {"channel": CHANNEL, "tables": ",".join(sorted(tables))},
+        )
+
+
+def _collect_flushed(session: Session, _flush_context):
+    session.info.setdefault("coherence_tables", set()).update(
+        table.name
+        for instance in (*session.new, *session.dirty, *session.deleted)
+        for table in object_mapper(instance).tables
+    )
+
+
+def _collect_bulk(orm_context):
+    if not orm_context.is_select:
+        orm_context.session.info.setdefault("coherence_tables", set()).update(
+            x.name for x in visitors.iterate(orm_context.statement) if isinstance(x, Table)
+        )
+
+
+def _bump_collected(session: Session):
+    # The commit only flushes after this event, pending changes have to be
+    # collected first. Bumping once in sorted order keeps the version rows
+    # locked for the shortest time and always in the same order.
+    session.flush()
+    if tables := session.info.pop("coherence_tables", None):
+        _bump(session.connection(), tables)
+
+
+def _discard(session: Session):
+    session.info.pop("coherence_tables", None)
+
+
+LISTENERS = (
+    ("after_flush", _collect_flushed),
+    ("do_orm_execute", _collect_bulk),
+    ("before_commit", _bump_collected),
+    ("after_rollback", _discard),
+)
+
+
+def coherence_enabled() -> bool:
+    """
+    Whether cached results or events of other processes have to be kept
+    coherent
+    """
+    return bool(config.WORKERS > 1 or config.QUERY_CACHE_SIZE)
+
+
+def install_coherence():
+    """
+    Registers the session events that record table versions on every commit
+    """
+    for name, listener in LISTENERS:
+        if not event.contains(Session, name, listener):
+            event.listen(Session, name, listener)
+
+
+async def invalidate_all(engine: AsyncEngine):
+    """
+    Increments the version of every table, so all workers drop their caches
+    after writes that bypass the session, e.g. a restore or a manual edit
+    """
+    async with engine.begin() as connection:
+        await connection.run_sync(_bump, set(SQLModel.metadata.tables))
+
+
+class CoherenceWatcher(BackgroundTask):
+    """
+    Background task applying the writes of other workers to the local caches
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._wake: Optional[asyncio.Event] = None
+        self._versions: Dict[str, int] = {}
+        self._cursor = 0
+
+    async def start(self):
+        """
+        Reads the current versions and starts watching
+        """
+        async with get_engine().connect() as connection:
+            self._versions = await self._read_versions(connection)
+            self._cursor = (
+                await connection.execute(select(func.max(_CHANGES.c.id)))
+            ).scalar() or 0
+        hub.local_ids = set()
+        self._wake = asyncio.Event()
+        await super().start()
+
+    async def stop(self):
+        """
+        Stops watching
+        """
+        await super().stop()
+        hub.local_ids = None
+
+    @staticmethod
+    async def _read_versions(connection) -> Dict[str, int]:
+        return {
+            x.table_name: x.version
+            for x in await connection.execute(select(_VERSIONS))
+        }
+
+    async def _listen(self):
+        """
+        Opens a connection receiving the notifications of other workers. Its
+        termination wakes the loop, which then polls until it is reopened.
+        """
+        connection = await get_engine().connect()
+        try:
+            raw = (await connection.get_raw_connection()).driver_connection
+            await raw.add_listener(CHANNEL, lambda *_: self._wake.set())
+            raw.add_termination_listener(lambda *_: self._wake.set())
+        except Exception:
+            await connection.invalidate()
+            raise
+        return connection, raw
+
+    async def _check_listener(self, listener):
+        """
+        Returns the open listener or tries to open a new one
+        """
+        if listener is not None:
+            if not listener[1].is_closed():
+                return listener
+            logger.log(level=logging.WARNING, msg="Cache sync listener lost")
+            await listener[0].invalidate()
+        try:
+            return await self._listen()
+        except Exception as err:  # pylint: disable=broad-except
+            logger.log(level=logging.ERROR, msg=f"Cache sync listener failed: {err}")
+            return None
+
+    async def _poll(self):
+        async with get_engine().connect() as connection:
+            versions = await self._read_versions(connection)
+            query_cache.invalidate(
+                {x for x, version in versions.items() if self._versions.get(x) != version}
+            )
+            self._versions = versions
+            changes = ChangeLog.settled(
+                (
+                    await connection.execute(
+                        select(_CHANGES)
+                        .where(_CHANGES.c.id > self._cursor)
+                        .order_by(_CHANGES.c.id)
+                    )
+                ).all(),
+                self._cursor,
+                config.CHANGELOG_SETTLE_SECONDS,
+            )
+        if not changes:
+            return
+        self._cursor = changes[-1].id
+        hub.publish(
+            [
+                {
+                    "id": x.id,
+                    "entity_type": x.entity_type,
+                    "entity_id": x.entity_id,
+                    "deleted": x.deleted,
+                }
+                for x in changes
+                if x.id not in hub.local_ids
+            ]
+        )
+        hub.local_ids = {x for x in hub.local_ids if x > self._cursor}
+
+    async def _run(self):
+        notify = get_engine().sync_engine.dialect.name == "postgresql"
+        listener = None
+        try:
+            while True:
+                if notify:
+                    listener = await self._check_listener(listener)
+                try:
+                    await asyncio.wait_for(
+                        self._wake.wait(), config.CACHE_SYNC_INTERVAL_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+                try:
+                    await self._poll()
+                except Exception as err:  # pylint: disable=broad-except
+                    logger.log(level=logging.ERROR, msg=f"Cache sync failed: {err}")
+        finally:
+            if listener is not None:
+                await listener[0].close()
+
+
+watcher = CoherenceWatcher()
@@ -1,20 +1,77 @@
 """
 Module for database connections
 """
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from tracktor.config import config
+from tracktor.utils.sqlite import install_profile
+
+_ENGINE: Optional[AsyncEngine] = None
+_SESSION_FACTORY: Optional[sessionmaker] = None
+
 
-engine = create_async_engine(
-    config.SQLALCHEMY_DATABASE_URI, echo=config.SQL_DEBUG, future=True
-)
+def get_engine() -> AsyncEngine:
+    """
+    Returns the database engine and creates it on first use. SQLite
+    connections are pooled so the pragmas of the profile only run once per
+    connection.
+    """
+    global _ENGINE  # pylint: disable=global-statement
+    if _ENGINE is None:
+        options = {"query_cache_size": config.SQL_COMPILED_CACHE_SIZE}
+        if config.SQLALCHEMY_DATABASE_URI.startswith("sqlite"):
+            options["poolclass"] = AsyncAdaptedQueuePool
+        elif config.SQLALCHEMY_DATABASE_URI.startswith("postgresql"):
+            options["connect_args"] = {
+                "prepared_statement_cache_size": config.PREPARED_STATEMENT_CACHE_SIZE
+            }
+        _ENGINE = create_async_engine(
+            config.SQLALCHEMY_DATABASE_URI,
+            echo=config.SQL_DEBUG,
+            future=True,
+            **options,
+        )
+        if _ENGINE.sync_engine.dialect.name == "sqlite":
+            install_profile(_ENGINE)
+    return _ENGINE
+
+
+def engine_created() -> bool:
+    """
+    Whether the database engine was already built from the config
+    """
+    return _ENGINE is not None
+
+
+def get_session_factory() -> sessionmaker:
+    """
+    Returns the sessionmaker bound to the database engine
+    """
+    global _SESSION_FACTORY  # pylint: disable=global-statement
+    if _SESSION_FACTORY is None:
+        _SESSION_FACTORY = sessionmaker(
+            get_engine(), class_=AsyncSession, expire_on_commit=False
+        )
+    return _SESSION_FACTORY
+
+
+async def dispose_engine():
+    """
+    Closes all connections so the next use creates a new engine
+    """
+    global _ENGINE, _SESSION_FACTORY  # pylint: disable=global-statement
+    if _ENGINE is not None:
+        await _ENGINE.dispose()
+    _ENGINE = _SESSION_FACTORY = None
 
 
 async def get_session() -> AsyncSession:
     """
     Return a AsyncSession suitable for Depends()
     """
-    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-    async with async_session() as session:
+    async with get_session_factory()() as session:
         yield session
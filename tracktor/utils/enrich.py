@@ -0,0 +1,383 @@
+"""
+Module for enriching the streaming links of playlists
+
+Every link in the spotify, amazon and apple_music fields is parsed into the
+canonical id of its provider, then its oEmbed document or public page is
+fetched for title and cover. Requests go through a pluggable fetcher sharing
+one connection pool, run with bounded concurrency, are retried with
+exponential backoff and are kept in the response cache table, so later runs
+only revalidate what is stale.
+"""
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Pattern, Protocol, Tuple
+from urllib.parse import quote
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import noload, sessionmaker
+
+from tracktor.config import config
+from tracktor.models import Playlist, PlaylistLink, ResponseCache
+
+MAX_BODY = 256 * 1024
+MAX_RETRY_AFTER = 60.0
+RETRY_STATUS = {408, 425, 429, 500, 502, 503, 504}
+CACHED_STATUS = {200, 404, 410}
+
+
+@dataclass(frozen=True)
+class Provider:
+    """
+    Rules to resolve the links of one streaming service
+    """
+
+    field: str
+    pattern: Pattern
+    canonical: str
+    fetch: str
+    base_url: str
+    kind: str
+
+
+PROVIDERS = (
+    Provider(
+        "spotify",
+        re.compile(
+            r"^(?:https?://open\.spotify\.com/(?:intl-[a-z-]+/)?playlist/|spotify:playlist:)"
+            r"(?P<id>[A-Za-z0-9]{22})(?:[/?#]|$)"
+        ),
+        "https://open.spotify.com/playlist/{id}",
+        "/oembed?url={quoted}",
+        "ENRICH_SPOTIFY_URL",
+        "oembed",
+    ),
+    Provider(
+        "apple_music",
+        re.compile(
+            r"^https?://music\.apple\.com/(?P<country>[a-z]{2})/playlist/"
+            r"(?:[^/?#]+/)?(?P<id>pl\.[A-Za-z0-9-]+)(?:[/?#]|$)"
+        ),
+        "https://music.apple.com/{country}/playlist/{id}",
+        "/{country}/playlist/{id}",
+        "ENRICH_APPLE_MUSIC_URL",
+        "opengraph",
+    ),
+    Provider(
+        "amazon",
+        re.compile(
+            r"^https?://music\.amazon\.[a-z.]+/(?:user-)?playlists/"
+            r"(?P<id>[A-Za-z0-9]+)(?:[/?#]|$)"
+        ),
+        "https://music.amazon.com/playlists/{id}",
+        "/playlists/{id}",
+        "ENRICH_AMAZON_URL",
+        "opengraph",
+    ),
+)
+
+
+def resolve(provider: Provider, link: str) -> Optional[Tuple[str, str, str]]:
+    """
+    Returns canonical id, canonical url and metadata url of a link or None if
+    the link does not belong to the provider
+    """
+    if not (match := provider.pattern.match(link.strip())):
+        return None
+    groups = match.groupdict()
+    canonical = provider.canonical.format(**groups)
+    fetch = provider.fetch.format(quoted=quote(canonical, safe=""), **groups)
+    return groups["id"], canonical, getattr(config, provider.base_url) + fetch
+
+
+class _OpenGraphParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.properties: Dict[str, str] = {}
+
+    def handle_starttag(self, tag, attrs):
+        if tag != "meta":
+            return
+        attributes = dict(attrs)
+        name = attributes.get("property") or attributes.get("name") or ""
+        if name.startswith("og:") and attributes.get("content"):
+            self.properties.setdefault(name, attributes["content"])
+
+
+def parse_metadata(kind: str, body: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Extracts title and cover url from an oEmbed document or an html page
+    """
+    if kind == "oembed":
+        try:
+            document = json.loads(body)
+        except ValueError:
+            return None, None
+        return document.get("title"), document.get("thumbnail_url")
+    parser = _OpenGraphParser()
+    parser.feed(body)
+    return parser.properties.get("og:title"), parser.properties.get("og:image")
+
+
+@dataclass
+class FetchResponse:
+    """
+    Status, body and cache validators of a fetched url
+    """
+
+    status: int
+    body: str
+    etag: Optional[str] = None
+    retry_after: Optional[float] = None
+
+
+class FetchError(Exception):
+    """
+    Error if a url could not be fetched at all
+    """
+
+
+class Fetcher(Protocol):
+    """
+    Interface of the http client used by the enrichment
+    """
+
+    async def fetch(self, url: str, etag: Optional[str] = None) -> FetchResponse:
+        """
+        Fetches the url, conditionally if an etag is given
+        """
+
+    async def close(self):
+        """
+        Releases all connections
+        """
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    try:
+        return min(float(value), MAX_RETRY_AFTER) if value else None
+    except ValueError:
+        return None
+
+
+class HttpxFetcher:
+    """
+    Fetcher sharing one pool of keep-alive connections between all requests
+    """
+
+    def __init__(self, connections: int, timeout: float, transport=None):
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=connections, max_keepalive_connections=connections
+            ),
+            timeout=timeout,
+            follow_redirects=True,
+            transport=transport,
+            headers={"User-Agent": "tracktor"},
+        )
+
+    async def fetch(self, url: str, etag: Optional[str] = None) -> FetchResponse:
+        """
+        Fetches the url, conditionally if an etag is given
+        """
+        try:
+            response = await self.client.get(
+                url, headers={"If-None-Match": etag} if etag else None
+            )
+        except httpx.HTTPError as err:
+            raise FetchError(str(err)) from err
+        return FetchResponse(
+            status=response.status_code,
+            body=response.text[:MAX_BODY],
+            etag=response.headers.get("etag"),
+            retry_after=_retry_after(response.headers.get("retry-after")),
+        )
+
+    async def close(self):
+        """
+        Releases all connections
+        """
+        await self.client.aclose()
+
+
+@dataclass
+class EnrichReport:
+    """
+    Outcome of an enrichment run
+    """
+
+    playlists: int = 0
+    links: Counter = field(default_factory=Counter)
+    requests: int = 0
+    cache_hits: int = 0
+    seconds: float = 0.0
+
+
+class LinkEnricher:  # pylint: disable=too-few-public-methods
+    """
+    Resolves the links of playlists page by page
+    """
+
+    def __init__(self, fetcher: Fetcher, concurrency: int, retries: int):
+        self.fetcher = fetcher
+        self.retries = retries
+        self.report = EnrichReport()
+        self._slots = asyncio.Semaphore(concurrency)
+
+    def _delay(self, attempt: int, response: Optional[FetchResponse]) -> float:
+        if response is not None and response.retry_after is not None:
+            return response.retry_after
+        return config.ENRICH_BACKOFF_SECONDS * 2 ** attempt * random.uniform(0.5, 1.5)
+
+    async def _request(self, url: str, etag: Optional[str]) -> Optional[FetchResponse]:
+        response = None
+        for attempt in range(self.retries + 1):
+            try:
+                async with self._slots:
+                    self.report.requests += 1
+                    response = await self.fetcher.fetch(url, etag)
+            except FetchError:
+                response = None
+            if response is not None and response.status not in RETRY_STATUS:
+                return response
+            if attempt < self.retries:
+                await asyncio.sleep(self._delay(attempt, response))
+        return None
+
+    async def _fetch(
+        self, url: str, cached: Optional[ResponseCache]
+    ) -> Tuple[Optional[FetchResponse], bool]:
+        """
+        Returns the response and whether the cache entry has to be written
+        """
+        if cached and cached.fetched_at > datetime.utcnow() - timedelta(
+            seconds=config.ENRICH_CACHE_TTL_SECONDS
+        ):
+            self.report.cache_hits += 1
+            return FetchResponse(cached.status, cached.body, cached.etag), False
+        response = await self._request(url, cached.etag if cached else None)
+        if response is not None and response.status == 304 and cached:
+            return FetchResponse(cached.status, cached.body, cached.etag), True
+        return response, response is not None and response.status in CACHED_STATUS
+
+    @staticmethod
+    def _link(
+        provider: Provider,
+        link: str,
+        resolved: Optional[Tuple[str, str, str]],
+        response: Optional[FetchResponse],
+    ) -> PlaylistLink:
+        result = PlaylistLink(provider=provider.field, url=link, status="invalid")
+        if resolved is None:
+            return result
+        result.canonical_id, result.canonical_url, _ = resolved
+        if response is None or response.status not in CACHED_STATUS:
+            result.status = "error"
+        elif response.status != 200:
+            result.status = "not_found"
+        else:
+            result.status = "ok"
+            result.title, result.image = parse_metadata(provider.kind, response.body)
+        return result
+
+    async def _fetch_all(
+        self, session: AsyncSession, urls: List[str]
+    ) -> Dict[str, Optional[FetchResponse]]:
+        keys = {x: hashlib.sha256(x.encode()).hexdigest() for x in urls}
+        cached = {
+            x.key: x
+            for x in (
+                await session.execute(
+                    select(ResponseCache).where(ResponseCache.key.in_(keys.values()))
+                )
+            ).scalars()
+        }
+        results = await asyncio.gather(
+            *(self._fetch(url, cached.get(key)) for url, key in keys.items())
+        )
+        for url, (response, store) in zip(keys, results):
+            if store:
+                await session.merge(
+                    ResponseCache(
+                        key=keys[url],
+                        status=response.status,
+                        etag=response.etag,
+                        body=response.body,
+                    )
+                )
+        return {url: response for url, (response, _) in zip(keys, results)}
+
+    async def enrich_page(self, session: AsyncSession, playlists: List[Playlist]):
+        """
+        Resolves and stores the links of the given playlists
+        """
+        jobs = [
+            (playlist, provider, link, resolve(provider, link))
+            for playlist in playlists
+            for provider in PROVIDERS
+            if (link := getattr(playlist, provider.field))
+        ]
+        fetched = await self._fetch_all(session, list({x[3][2] for x in jobs if x[3]}))
+        stale = {
+            (x.playlist_id, x.provider): x
+            for x in (
+                await session.execute(
+                    select(PlaylistLink).where(
+                        PlaylistLink.playlist_id.in_([x.id for x in playlists])
+                    )
+                )
+            ).scalars()
+        }
+        for playlist, provider, link, resolved in jobs:
+            result = self._link(
+                provider, link, resolved, fetched[resolved[2]] if resolved else None
+            )
+            result.playlist_id = playlist.id
+            self.report.links[result.status] += 1
+            stale.pop((playlist.id, provider.field), None)
+            await session.merge(result)
+        for link in stale.values():
+            await session.delete(link)
+        await session.commit()
+        self.report.playlists += len(playlists)
+
+
+async def enrich_links(
+    session_factory: sessionmaker, fetcher: Fetcher, concurrency: int, batch_size: int
+) -> EnrichReport:
+    """
+    Enriches the links of all playlists in pages of the given size
+    """
+    started = time.perf_counter()
+    enricher = LinkEnricher(fetcher, concurrency, config.ENRICH_RETRIES)
+    last_id = 0
+    while True:
+        async with session_factory() as session:
+            playlists = (
+                (
+                    await session.execute(
+                        select(Playlist)
+                        .where(Playlist.id > last_id)
+                        .order_by(Playlist.id)
+                        .limit(batch_size)
+                        .options(noload(Playlist.items), noload(Playlist.category))
+                    )
+                )
+                .scalars()
+                .all()
+            )
+            if not playlists:
+                break
+            last_id = playlists[-1].id
+            await enricher.enrich_page(session, playlists)
+    enricher.report.seconds = time.perf_counter() - started
+    return enricher.report
@@ -0,0 +1,104 @@
+"""
+Module for the in-process broadcast of committed catalog changes
+"""
+import asyncio
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from tracktor.config import config
+from tracktor.models import ChangeLog
+
+
+class Subscriber:  # pylint: disable=too-few-public-methods
+    """
+    Bounded queue of pending events for a single listener
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+
+
+class EventHub:
+    """
+    Fans out change events to all subscribers without ever blocking the publisher.
+    A subscriber whose queue is full is dropped instead of buffering without limit
+    and can catch up through the sync endpoint with the last event id it received.
+    Without a queue size the configured EVENT_QUEUE_SIZE is used.
+    """
+
+    def __init__(self, queue_size: Optional[int] = None):
+        self._queue_size = queue_size
+        self.local_ids: Optional[Set[int]] = None
+        self._subscribers: Set[Subscriber] = set()
+
+    @property
+    def queue_size(self) -> int:
+        """
+        Number of events buffered per subscriber
+        """
+        if self._queue_size is None:
+            return config.EVENT_QUEUE_SIZE
+        return self._queue_size
+
+    def subscribe(self) -> Subscriber:
+        """
+        Registers a new subscriber
+        """
+        subscriber = Subscriber(self.queue_size)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        """
+        Removes a subscriber
+        """
+        self._subscribers.discard(subscriber)
+
+    def publish(self, events: List[Dict]):
+        """
+        Delivers the given events to every subscriber
+        """
+        for subscriber in list(self._subscribers):
+            try:
+                for change in events:
+                    subscriber.queue.put_nowait(change)
+            except asyncio.QueueFull:
+                subscriber.dropped = True
+                self.unsubscribe(subscriber)
+
+    def __len__(self):
+        return len(self._subscribers)
+
+
+hub = EventHub()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session: Session, _flush_context):
+    changes = [
+        {
+            "id": x.id,
+            "entity_type": x.entity_type,
+            "entity_id": x.entity_id,
+            "deleted": x.deleted,
+        }
+        for x in session.new
+        if isinstance(x, ChangeLog)
+    ]
+    if hub.local_ids is not None:
+        hub.local_ids.update(x["id"] for x in changes)
+    session.info.setdefault("changes", []).extend(changes)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_changes(session: Session):
+    if changes := session.info.pop("changes", None):
+        hub.publish(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session):
+    session.info.pop("changes", None)
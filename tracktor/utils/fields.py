@@ -0,0 +1,142 @@
+"""
+Module for sparse fieldsets and relationship includes on read endpoints
+"""
+from typing import Any, Dict, List, Optional, Sequence, Type
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only, noload, selectinload
+from sqlmodel import SQLModel
+
+from tracktor.error import BadRequestException
+
+
+def _split(value: Optional[str]) -> Optional[List[str]]:
+    if value is None:
+        return None
+    return [x.strip() for x in value.split(",") if x.strip()]
+
+
+class FieldSelection:
+    """
+    Parsed fields and includes of a single request
+    """
+
+    def __init__(
+        self,
+        fields: List[str],
+        include: List[str],
+        relationships: Dict[str, Type[SQLModel]],
+    ):
+        self.fields = fields
+        self.include = include
+        self.relationships = relationships
+
+    def options(self, table_model: Type[SQLModel], *extra_columns: str) -> List[Any]:
+        """
+        Returns loader options that only select the requested and extra columns
+        and load nothing but the included relationships
+        """
+        mapper = inspect(table_model)
+        columns = set(self.fields) | set(extra_columns) | {
+            mapper.get_property_by_column(x).key for x in mapper.primary_key
+        }
+        loaders = []
+        for name, relationship in mapper.relationships.items():
+            if name in self.include:
+                columns.update(
+                    mapper.get_property_by_column(x).key
+                    for x in relationship.local_columns
+                )
+                loaders.append(selectinload(getattr(table_model, name)))
+            else:
+                loaders.append(noload(getattr(table_model, name)))
+        return [
+            load_only(*[getattr(table_model, x) for x in sorted(columns)]),
+            *loaders,
+        ]
+
+    def render(self, entity: Any) -> Dict[str, Any]:
+        """
+        Returns the requested fields and relationships of an entity
+        """
+        result = {x: getattr(entity, x) for x in self.fields}
+        for name in self.include:
+            value = getattr(entity, name)
+            nested = self.relationships[name].__fields__
+            if isinstance(value, list):
+                result[name] = [{x: getattr(y, x) for x in nested} for y in value]
+            else:
+                result[name] = (
+                    {x: getattr(value, x) for x in nested} if value is not None else None
+                )
+        return result
+
+    def response(self, content: Any) -> JSONResponse:
+        """
+        Renders one entity or a list of entities to a response
+        """
+        if isinstance(content, list):
+            return JSONResponse(jsonable_encoder([self.render(x) for x in content]))
+        return JSONResponse(jsonable_encoder(self.render(content)))
+
+    def batch_response(
+        self, ids: List[str], content: List[Any], key: str = "entity_id"
+    ) -> JSONResponse:
+        """
+        Renders entities in the order of the requested identifiers and lists misses
+        """
+        found = {getattr(x, key): x for x in content}
+        return JSONResponse(
+            jsonable_encoder(
+                {
+                    "results": [
+                        self.render(found[x]) if x in found else None for x in ids
+                    ],
+                    "missing": [x for x in dict.fromkeys(ids) if x not in found],
+                }
+            )
+        )
+
+
+class SparseFields:  # pylint: disable=too-few-public-methods
+    """
+    Dependency that parses the fields and include query parameters of a request.
+    Without parameters every field and the default includes are returned.
+    """
+
+    def __init__(
+        self,
+        response_model: Type[SQLModel],
+        relationships: Optional[Dict[str, Type[SQLModel]]] = None,
+        default_include: Sequence[str] = (),
+    ):
+        self.relationships = relationships or {}
+        self.fields = [x for x in response_model.__fields__ if x not in self.relationships]
+        self.default_include = list(default_include)
+
+    def __call__(
+        self, fields: Optional[str] = None, include: Optional[str] = None
+    ) -> FieldSelection:
+        requested_fields = _split(fields)
+        requested_include = _split(include)
+        if requested_fields is not None:
+            if unknown := set(requested_fields) - set(self.fields):
+                raise BadRequestException(
+                    message=f"Unknown fields: {', '.join(sorted(unknown))}"
+                )
+        if requested_include is not None:
+            if unknown := set(requested_include) - set(self.relationships):
+                raise BadRequestException(
+                    message=f"Unknown includes: {', '.join(sorted(unknown))}"
+                )
+        return FieldSelection(
+            fields=[x for x in self.fields if x in requested_fields]
+            if requested_fields is not None
+            else self.fields,
+            include=[x for x in self.relationships if x in requested_include]
+            if requested_include is not None
+            else self.default_include,
+            relationships=self.relationships,
+        )
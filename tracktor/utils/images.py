@@ -0,0 +1,178 @@
+"""
+Module for storing uploaded images and their derivatives
+
+Every image is stored on local disk in a directory named after the sha256 of
+the uploaded bytes. A stored file therefore never changes and can be cached
+by clients forever. Decoding and resizing run in a process pool so large
+uploads do not block the event loop.
+"""
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from fastapi import UploadFile
+from PIL import Image, ImageOps
+
+from tracktor.config import config
+from tracktor.error import PayloadTooLargeException, UnsupportedMediaTypeException
+from tracktor.models import ImageResponse
+
+ORIGINAL_FORMATS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "GIF": "gif"}
+DERIVATIVE_FORMATS = {"webp": "WEBP", "jpg": "JPEG"}
+MEDIA_TYPES = {
+    "jpg": "image/jpeg",
+    "png": "image/png",
+    "webp": "image/webp",
+    "gif": "image/gif",
+}
+IMMUTABLE = "public, max-age=31536000, immutable"
+IMAGE_ID = re.compile("^[0-9a-f]{64}$")
+DERIVATIVE = re.compile(f"^[0-9]+\\.({'|'.join(DERIVATIVE_FORMATS)})$")
+CHUNK_SIZE = 64 * 1024
+
+
+def _write(path: str, save: Callable[[str], None]):
+    if os.path.exists(path):
+        return
+    temporary = f"{path}.{os.getpid()}.tmp"
+    save(temporary)
+    os.replace(temporary, path)
+
+
+def _write_bytes(data: bytes, path: str):
+    with open(path, "wb") as file:
+        file.write(data)
+
+
+def process_image(
+    data: bytes, directory: str, sizes: Sequence[int]
+) -> Tuple[str, List[str]]:
+    """
+    Stores the original and resized WebP and JPEG derivatives of an image,
+    returns the content hash and the derivative names. Runs in a worker process.
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.verify()
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except (OSError, SyntaxError, Image.DecompressionBombError) as err:
+        raise ValueError("The file is not a valid image") from err
+    if image.format not in ORIGINAL_FORMATS:
+        raise ValueError(f"Unsupported image format {image.format}")
+
+    digest = hashlib.sha256(data).hexdigest()
+    target = os.path.join(directory, digest)
+    os.makedirs(target, exist_ok=True)
+    _write(
+        os.path.join(target, f"original.{ORIGINAL_FORMATS[image.format]}"),
+        partial(_write_bytes, data),
+    )
+
+    image = ImageOps.exif_transpose(image).convert("RGB")
+    names = []
+    for size in sorted(sizes):
+        resized = None
+        for extension, image_format in DERIVATIVE_FORMATS.items():
+            name = f"{size}.{extension}"
+            names.append(name)
+            if os.path.exists(os.path.join(target, name)):
+                continue
+            if resized is None:
+                resized = image.copy()
+                resized.thumbnail(
+                    (size, size), Image.LANCZOS  # pylint: disable=no-member
+                )
+            _write(
+                os.path.join(target, name),
+                partial(resized.save, format=image_format, quality=82),
+            )
+    return digest, names
+
+
+async def read_upload(upload: UploadFile) -> bytes:
+    """
+    Reads an uploaded file up to the configured maximum size
+    """
+    chunks, size = [], 0
+    while chunk := await upload.read(CHUNK_SIZE):
+        size += len(chunk)
+        if size > config.IMAGE_MAX_BYTES:
+            raise PayloadTooLargeException(
+                message=f"Images can be at most {config.IMAGE_MAX_BYTES} bytes"
+            )
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+class ImageStore:
+    """
+    Stores images on local disk and resolves their files
+    """
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=config.IMAGE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    async def store(self, data: bytes) -> ImageResponse:
+        """
+        Stores an image with its derivatives off the event loop
+        """
+        try:
+            digest, names = await asyncio.get_running_loop().run_in_executor(
+                self._executor(),
+                process_image,
+                data,
+                config.IMAGE_DIR,
+                config.IMAGE_SIZES,
+            )
+        except ValueError as err:
+            raise UnsupportedMediaTypeException(message=str(err)) from err
+        return ImageResponse(
+            id=digest,
+            url=f"/images/{digest}",
+            derivatives=[f"/images/{digest}/{x}" for x in names],
+        )
+
+    @staticmethod
+    def path(image_id: str, name: Optional[str] = None) -> Optional[str]:
+        """
+        Returns the path of the original or of a derivative if it exists
+        """
+        if not IMAGE_ID.match(image_id) or (
+            name is not None and not DERIVATIVE.match(name)
+        ):
+            return None
+        directory = os.path.join(config.IMAGE_DIR, image_id)
+        for candidate in (
+            [f"original.{x}" for x in ORIGINAL_FORMATS.values()]
+            if name is None
+            else [name]
+        ):
+            if os.path.isfile(path := os.path.join(directory, candidate)):
+                return path
+        return None
+
+    def close(self):
+        """
+        Shuts the worker processes down
+        """
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+image_store = ImageStore()
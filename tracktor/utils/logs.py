@@ -0,0 +1,251 @@
+"""
+Module for structured access and audit logging
+
+Log records are put on a bounded queue and written as JSON lines by a
+background thread in batches, so a request never waits for log output. When
+the queue is full new records are dropped and counted instead of blocking
+the event loop.
+"""
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime
+from logging.handlers import QueueHandler
+from typing import Optional, TextIO
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Match
+
+from tracktor.config import config
+
+access_logger = logging.getLogger("tracktor.access")
+audit_logger = logging.getLogger("tracktor.audit")
+
+
+@dataclass
+class RequestContext:
+    """
+    Details of the running request that are collected while it is handled
+    """
+
+    user_id: Optional[str] = None
+    db_seconds: float = 0.0
+
+
+_REQUEST: ContextVar[Optional[RequestContext]] = ContextVar("request", default=None)
+
+
+def set_request_user(user_id: str):
+    """
+    Remembers the authenticated user for the access log of the running request
+    """
+    if context := _REQUEST.get():
+        context.user_id = user_id
+
+
+def audit(action: str, **fields):
+    """
+    Writes an entry to the audit trail, the acting user is taken from the request
+    """
+    context = _REQUEST.get()
+    audit_logger.info(
+        action,
+        extra={
+            "fields": {
+                "action": action,
+                "actor": context.user_id if context else None,
+                **fields,
+            }
+        },
+    )
+
+
+def _start_query(conn, _cursor, _statement, _parameters, _context, _executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _end_query(conn, _cursor, _statement, _parameters, _context, _executemany):
+    if (started := conn.info.get("query_started")) and (context := _REQUEST.get()):
+        context.db_seconds += time.perf_counter() - started.pop()
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats a record and its structured fields as one JSON line
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(
+            {
+                "time": datetime.utcfromtimestamp(record.created).isoformat(),
+                "level": record.levelname,
+                "logger": record.name,
+                "message": record.getMessage(),
+                **getattr(record, "fields", {}),
+            },
+            default=str,
+        )
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Queue handler that never blocks and counts the records it had to drop
+    """
+
+    def __init__(self, records: queue.Queue):
+        super().__init__(records)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogWriter(threading.Thread):
+    """
+    Thread draining the queue and writing the records in batches
+    """
+
+    def __init__(self, records: queue.Queue, stream: TextIO, batch_size: int):
+        super().__init__(name="tracktor-log-writer", daemon=True)
+        self.records = records
+        self.stream = stream
+        self.batch_size = batch_size
+        self.formatter = JsonFormatter()
+
+    def _batch(self) -> Optional[list]:
+        if (record := self.records.get()) is None:
+            return None
+        batch = [record]
+        while len(batch) < self.batch_size:
+            try:
+                record = self.records.get_nowait()
+            except queue.Empty:
+                break
+            if record is None:
+                self.records.put(None)
+                break
+            batch.append(record)
+        return batch
+
+    def run(self):
+        while (batch := self._batch()) is not None:
+            try:
+                self.stream.write(
+                    "".join(self.formatter.format(x) + "\n" for x in batch)
+                )
+                self.stream.flush()
+            except Exception:  # pylint: disable=broad-except
+                logging.getLogger(__name__).exception("Writing logs failed")
+
+
+class LogPipeline:
+    """
+    Connects the access and audit loggers to the queue and its writer thread
+    """
+
+    def __init__(self):
+        self.handler: Optional[DroppingQueueHandler] = None
+        self._writer: Optional[LogWriter] = None
+
+    def start(self):
+        """
+        Starts the writer thread and attaches the loggers
+        """
+        if self._writer:
+            return
+        records: queue.Queue = queue.Queue(config.LOG_QUEUE_SIZE)
+        stream = (
+            open(config.LOG_FILE, "a", encoding="utf-8")  # pylint: disable=consider-using-with
+            if config.LOG_FILE
+            else sys.stdout
+        )
+        self._writer = LogWriter(records, stream, config.LOG_BATCH_SIZE)
+        self._writer.start()
+        self.handler = DroppingQueueHandler(records)
+        for logger in (access_logger, audit_logger):
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(self.handler)
+        if not event.contains(Engine, "before_cursor_execute", _start_query):
+            event.listen(Engine, "before_cursor_execute", _start_query)
+            event.listen(Engine, "after_cursor_execute", _end_query)
+
+    def stop(self):
+        """
+        Writes the remaining records and stops the writer thread
+        """
+        if not self._writer:
+            return
+        for logger in (access_logger, audit_logger):
+            logger.removeHandler(self.handler)
+        self._writer.records.put(None)
+        self._writer.join(timeout=5)
+        if self._writer.stream is not sys.stdout:
+            self._writer.stream.close()
+        self._writer = None
+
+
+class AccessLogMiddleware:  # pylint: disable=too-few-public-methods
+    """
+    ASGI middleware writing one access log entry per request with the matched
+    route, status, latency, time spent in the database and the user
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    @staticmethod
+    def _route(scope) -> Optional[str]:
+        for route in scope["app"].routes:
+            if route.matches(scope)[0] == Match.FULL:
+                return route.path
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        context = RequestContext()
+        token = _REQUEST.set(context)
+        started = time.perf_counter()
+        response_status = 500
+
+        async def send_status(message):
+            nonlocal response_status
+            if message["type"] == "http.response.start":
+                response_status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            _REQUEST.reset(token)
+            access_logger.info(
+                "request",
+                extra={
+                    "fields": {
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "route": self._route(scope),
+                        "status": response_status,
+                        "latency_ms": round((time.perf_counter() - started) * 1000, 3),
+                        "db_ms": round(context.db_seconds * 1000, 3),
+                        "user_id": context.user_id,
+                    }
+                },
+            )
+
+
+log_pipeline = LogPipeline()
@@ -0,0 +1,104 @@
+"""
+Module for coalescing concurrent identical read requests
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, List, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+
+
+class SingleFlight:
+    """
+    Runs at most one computation per key at a time. Callers arriving while it is
+    in flight await the same result or exception. The computation runs in its own
+    task so a disconnecting caller does not cancel it for the others, and it is
+    cancelled once the timeout is exceeded.
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable]):
+        """
+        Returns the result of the in-flight computation for the key or starts it
+        """
+        if not (task := self._calls.get(key)):
+            task = asyncio.ensure_future(asyncio.wait_for(func(), self.timeout))
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(task)
+
+    def __len__(self):
+        return len(self._calls)
+
+
+class SingleFlightMiddleware:  # pylint: disable=too-few-public-methods
+    """
+    ASGI middleware that shares one rendered response between concurrent GET
+    requests with the same path, normalized query, authorization, encoding
+    and conditional headers. Only paths below the given prefixes are coalesced.
+    """
+
+    def __init__(self, app, paths: Sequence[str], timeout: float):
+        self.app = app
+        self.paths = tuple(paths)
+        self.flight = SingleFlight(timeout)
+
+    def _key(self, scope) -> Hashable:
+        query = urlencode(sorted(parse_qsl(scope["query_string"].decode("latin-1"))))
+        headers = dict(scope["headers"])
+        return (
+            scope["path"],
+            query,
+            headers.get(b"authorization", b""),
+            headers.get(b"accept-encoding", b""),
+            headers.get(b"if-none-match", b""),
+            headers.get(b"if-modified-since", b""),
+        )
+
+    async def _render(self, scope) -> Tuple[int, List, bytes]:
+        response = {"status": 500, "headers": [], "body": []}
+        sent = asyncio.Event()
+
+        async def receive():
+            if not sent.is_set():
+                sent.set()
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await asyncio.Event().wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = message.get("headers", [])
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+
+        await self.app(scope, receive, send)
+        return response["status"], response["headers"], b"".join(response["body"])
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "GET"
+            or not scope["path"].startswith(self.paths)
+        ):
+            await self.app(scope, receive, send)
+            return
+        try:
+            status_code, headers, body = await self.flight.do(
+                self._key(scope), lambda: self._render(dict(scope))
+            )
+        except asyncio.TimeoutError:
+            await JSONResponse(
+                {"detail": "Request timed out"},
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            )(scope, receive, send)
+            return
+        await send(
+            {"type": "http.response.start", "status": status_code, "headers": headers}
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,87 @@
+"""
+Module for the SQLite connection profile
+
+SQLite is tuned on every new connection: the write ahead log lets readers
+continue while a writer commits, synchronous=NORMAL only syncs at checkpoints
+and the busy timeout makes concurrent writers wait instead of failing. A
+background task checkpoints the log and refreshes the query planner
+statistics in a fixed interval.
+"""
+import asyncio
+import logging
+from typing import Optional
+
+from fastapi.logger import logger
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from tracktor.config import config
+from tracktor.error import DatabaseConstructionError
+from tracktor.utils.tasks import BackgroundTask
+
+JOURNAL_MODES = {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+
+def _pragmas():
+    journal_mode = config.SQLITE_JOURNAL_MODE.upper()
+    synchronous = config.SQLITE_SYNCHRONOUS.upper()
+    if journal_mode not in JOURNAL_MODES:
+        raise DatabaseConstructionError(f"Unsupported journal mode {journal_mode}")
+    if synchronous not in SYNCHRONOUS_MODES:
+        raise DatabaseConstructionError(f"Unsupported synchronous mode {synchronous}")
+    return (
+        f"PRAGMA journal_mode={journal_mode}",
+        f"PRAGMA synchronous={synchronous}",
+        f"PRAGMA busy_timeout={int(config.SQLITE_BUSY_TIMEOUT_MS)}",
+        f"PRAGMA mmap_size={int(config.SQLITE_MMAP_SIZE)}",
+        f"PRAGMA cache_size={int(config.SQLITE_CACHE_SIZE)}",
+    )
+
+
+def install_profile(engine: AsyncEngine):
+    """
+    Applies the configured pragmas to every new connection of the engine
+    """
+    pragmas = _pragmas()
+    maintenance.engine = engine
+
+    def _connect(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    event.listen(engine.sync_engine, "connect", _connect)
+
+
+class SqliteMaintenance(BackgroundTask):
+    """
+    Background task checkpointing the write ahead log and optimizing the database
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.engine: Optional[AsyncEngine] = None
+
+    async def run_once(self):
+        """
+        Checkpoints the write ahead log without blocking readers or writers
+        and lets SQLite refresh the statistics it needs
+        """
+        if self.engine is None:
+            return
+        async with self.engine.connect() as connection:
+            await connection.execute(text("PRAGMA wal_checkpoint(PASSIVE)"))
+            await connection.execute(text("PRAGMA optimize"))
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(config.SQLITE_MAINTENANCE_INTERVAL_SECONDS)
+            try:
+                await self.run_once()
+            except Exception as err:  # pylint: disable=broad-except
+                logger.log(level=logging.ERROR, msg=f"SQLite maintenance failed: {err}")
+
+
+maintenance = SqliteMaintenance()
@@ -0,0 +1,37 @@
+"""
+Module for rebuilding the catalog statistics
+"""
+from sqlalchemy import delete, func, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from tracktor.models import Item, Playlist, PlaylistItemLink, StatCounter
+
+STAT_QUERIES = {
+    "category_playlists": select(Playlist.category_id, func.count(Playlist.id))
+    .where(Playlist.category_id.isnot(None))
+    .group_by(Playlist.category_id),
+    "playlist_tracks": select(Playlist.entity_id, func.count(PlaylistItemLink.item_id))
+    .join(PlaylistItemLink, PlaylistItemLink.playlist_id == Playlist.id)
+    .group_by(Playlist.entity_id),
+    "item_playlists": select(
+        PlaylistItemLink.item_id, func.count(PlaylistItemLink.playlist_id)
+    ).group_by(PlaylistItemLink.item_id),
+    "artist_tracks": select(Item.artist, func.count(PlaylistItemLink.playlist_id))
+    .join(PlaylistItemLink, PlaylistItemLink.item_id == Item.id)
+    .group_by(Item.artist),
+}
+
+
+async def rebuild_stats(session: AsyncSession):
+    """
+    Replaces all counters with freshly aggregated values
+    """
+    await session.execute(delete(StatCounter))
+    for kind, query in STAT_QUERIES.items():
+        if rows := (await session.execute(query)).all():
+            await session.execute(
+                insert(StatCounter),
+                [{"kind": kind, "key": str(key), "value": value} for key, value in rows],
+            )
+    await session.commit()
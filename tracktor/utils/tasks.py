@@ -0,0 +1,35 @@
+"""
+Module for long running background tasks of the api
+"""
+import asyncio
+from typing import Optional
+
+
+class BackgroundTask:
+    """
+    Base class for a loop running next to the api until shutdown
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """
+        Starts the loop
+        """
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Cancels the loop and waits until it finished
+        """
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        raise NotImplementedError
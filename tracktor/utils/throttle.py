@@ -0,0 +1,273 @@
+"""
+Module for throttling login attempts
+
+The limits are kept in memory of the process by default. With several
+workers every process would allow the configured attempts on its own, so the
+state is kept in the database then and shared by all workers.
+"""
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Tuple
+
+from fastapi import Depends, Request
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import Table, case, delete, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.future import select
+
+from tracktor.config import config
+from tracktor.error import TooManyRequestsException
+from tracktor.models import LoginBucket, LoginFailure
+from tracktor.utils.database import get_engine
+
+_BUCKETS: Table = LoginBucket.__table__
+_FAILURES: Table = LoginFailure.__table__
+
+
+class MemoryThrottleStore:
+    """
+    In-process store for token buckets and failure windows. Every worker
+    counts on its own, so it only enforces the limits with a single one.
+    The number of tracked keys is bounded, the least recently used keys are
+    evicted first. A shared backend only has to provide the same coroutines.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: Dict[str, Tuple[float, float]] = OrderedDict()
+        self._failures: Dict[str, Deque[float]] = OrderedDict()
+
+    def _evict(self, entries: OrderedDict, key: str):
+        entries.move_to_end(key)
+        while len(entries) > self.max_keys:
+            entries.popitem(last=False)
+
+    async def consume(
+        self, key: str, capacity: int, per_second: float, now: float
+    ) -> float:
+        """
+        Takes a token from the bucket of the key and returns 0 or the seconds
+        until the next token is available
+        """
+        tokens, updated = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * per_second)
+        if tokens < 1:
+            self._buckets[key] = (tokens, now)
+            self._evict(self._buckets, key)
+            return (1 - tokens) / per_second
+        self._buckets[key] = (tokens - 1, now)
+        self._evict(self._buckets, key)
+        return 0
+
+    async def locked_for(self, key: str, limit: int, window: float, now: float) -> float:
+        """
+        Returns 0 or the seconds until the oldest failure inside the window expires
+        """
+        if not (failures := self._failures.get(key)):
+            return 0
+        while failures and failures[0] <= now - window:
+            failures.popleft()
+        if len(failures) < limit:
+            return 0
+        return failures[-limit] + window - now
+
+    async def add_failure(self, key: str, limit: int, now: float):
+        """
+        Records a failed attempt, only the last failures up to the limit are kept
+        """
+        failures = self._failures.setdefault(key, deque(maxlen=limit))
+        failures.append(now)
+        self._evict(self._failures, key)
+
+    async def clear_failures(self, key: str):
+        """
+        Forgets all failed attempts of the key
+        """
+        self._failures.pop(key, None)
+
+
+def _insert_ignore(dialect: str, table: Table):
+    if dialect == "mysql":
+        return insert(table).prefix_with("IGNORE")
+    return (
+        (postgresql if dialect == "postgresql" else sqlite)
+        .insert(table)
+        .on_conflict_do_nothing()
+    )
+
+
+class DatabaseThrottleStore:
+    """
+    Store for token buckets and failure windows shared by all workers.
+    Tokens are taken with a single conditional update, so concurrent workers
+    never hand out the same token. Buckets that refilled completely and
+    failures outside the window are pruned when new ones are written.
+    """
+
+    async def consume(
+        self, key: str, capacity: int, per_second: float, now: float
+    ) -> float:
+        """
+        Takes a token from the bucket of the key and returns 0 or the seconds
+        until the next token is available
+        """
+        refilled = _BUCKETS.c.tokens + (now - _BUCKETS.c.updated) * per_second
+        available = case((refilled > capacity, capacity), else_=refilled)
+        async with get_engine().begin() as connection:
+            for _ in range(2):
+                if (
+                    await connection.execute(
+                        update(_BUCKETS)
+                        .where(_BUCKETS.c.key == key, available >= 1)
+                        .ordered_values(
+                            (_BUCKETS.c.tokens, available - 1), (_BUCKETS.c.updated, now)
+                        )
+                    )
+                ).rowcount:
+                    return 0
+                if bucket := (
+                    await connection.execute(select(_BUCKETS).where(_BUCKETS.c.key == key))
+                ).first():
+                    tokens = min(
+                        capacity, bucket.tokens + (now - bucket.updated) * per_second
+                    )
+                    return (1 - tokens) / per_second
+                await connection.execute(
+                    delete(_BUCKETS).where(
+                        _BUCKETS.c.updated < now - capacity / per_second
+                    )
+                )
+                if (
+                    await connection.execute(
+                        _insert_ignore(connection.dialect.name, _BUCKETS).values(
+                            key=key, tokens=capacity - 1, updated=now
+                        )
+                    )
+                ).rowcount:
+                    return 0
+        return 0
+
+    async def locked_for(self, key: str, limit: int, window: float, now: float) -> float:
+        """
+        Returns 0 or the seconds until the oldest failure inside the window expires
+        """
+        async with get_engine().connect() as connection:
+            oldest = (
+                await connection.execute(
+                    select(_FAILURES.c.failed_at)
+                    .where(
+                        _FAILURES.c.key == key, _FAILURES.c.failed_at > now - window
+                    )
+                    .order_by(_FAILURES.c.failed_at.desc())
+                    .offset(limit - 1)
+                    .limit(1)
+                )
+            ).scalar()
+        return oldest + window - now if oldest is not None else 0
+
+    async def add_failure(self, key: str, _limit: int, now: float):
+        """
+        Records a failed attempt and drops all failures outside the window
+        """
+        async with get_engine().begin() as connection:
+            await connection.execute(
+                delete(_FAILURES).where(
+                    _FAILURES.c.failed_at <= now - config.LOGIN_FAILURE_WINDOW_SECONDS
+                )
+            )
+            await connection.execute(insert(_FAILURES).values(key=key, failed_at=now))
+
+    async def clear_failures(self, key: str):
+        """
+        Forgets all failed attempts of the key
+        """
+        async with get_engine().begin() as connection:
+            await connection.execute(delete(_FAILURES).where(_FAILURES.c.key == key))
+
+
+class LoginAttempt:
+    """
+    Throttle state of the current login request
+    """
+
+    def __init__(self, store: MemoryThrottleStore, ip_key: str, user_key: str):
+        self.store = store
+        self.ip_key = ip_key
+        self.user_key = user_key
+
+    async def failed(self):
+        """
+        Records a failed login for the client ip and the username
+        """
+        now = time.time()
+        await self.store.add_failure(self.ip_key, config.LOGIN_MAX_IP_FAILURES, now)
+        await self.store.add_failure(
+            self.user_key, config.LOGIN_MAX_USER_FAILURES, now
+        )
+
+    async def succeeded(self):
+        """
+        Resets the failures of the username after a successful login
+        """
+        await self.store.clear_failures(self.user_key)
+
+
+class LoginThrottle:  # pylint: disable=too-few-public-methods
+    """
+    Dependency that rejects login attempts before any password is verified,
+    when the client ip or the username is out of tokens or locked out by
+    too many failures inside the sliding window
+    """
+
+    def __init__(self, store=None):
+        self._store = store
+
+    @property
+    def store(self):
+        """
+        Store of the configured LOGIN_THROTTLE_STORE, the database with
+        several workers and the memory of the process otherwise
+        """
+        if self._store is None:
+            shared = config.LOGIN_THROTTLE_STORE or (
+                "database" if config.WORKERS > 1 else "memory"
+            )
+            self._store = (
+                DatabaseThrottleStore() if shared == "database" else MemoryThrottleStore()
+            )
+        return self._store
+
+    async def __call__(
+        self, request: Request, form_data: OAuth2PasswordRequestForm = Depends()
+    ) -> LoginAttempt:
+        attempt = LoginAttempt(
+            self.store,
+            f"ip:{request.client.host if request.client else ''}",
+            f"user:{form_data.username.lower()}",
+        )
+        now = time.time()
+        limits: List[Tuple[str, int]] = [
+            (attempt.ip_key, config.LOGIN_MAX_IP_FAILURES),
+            (attempt.user_key, config.LOGIN_MAX_USER_FAILURES),
+        ]
+        for key, limit in limits:
+            if retry_after := await self.store.locked_for(
+                key, limit, config.LOGIN_FAILURE_WINDOW_SECONDS, now
+            ):
+                raise TooManyRequestsException(
+                    message="Too many failed login attempts", retry_after=retry_after
+                )
+        for key, _ in limits:
+            if retry_after := await self.store.consume(
+                key,
+                config.LOGIN_ATTEMPTS_BURST,
+                config.LOGIN_ATTEMPTS_PER_MINUTE / 60,
+                now,
+            ):
+                raise TooManyRequestsException(
+                    message="Too many login attempts", retry_after=retry_after
+                )
+        return attempt
+
+
+login_throttle = LoginThrottle()
@@ -0,0 +1,121 @@
+"""
+Module for the api version registry
+
+Versioned routers are modules of ``tracktor.routers`` named ``v<major>`` or
+``v<major>_<minor>`` with a ``router`` and a ``__CHANGELOG__``. They are
+discovered once when the app is created and mounted below their version. The
+version listing and the openapi schema are rendered at the same time, so
+serving them only compares an ETag and picks an encoding.
+"""
+import gzip
+import hashlib
+import importlib
+import json
+import pkgutil
+import re
+from typing import Any, List, Optional
+
+from fastapi import FastAPI, Request, Response, status
+from packaging.version import Version
+
+from tracktor.models import VersionModel
+
+VERSIONED_ROUTER = re.compile(r"v\d+(_\d+)*")
+
+
+class RenderedJson:  # pylint: disable=too-few-public-methods
+    """
+    JSON body that is serialized and compressed once
+    """
+
+    def __init__(self, content: Any):
+        self.body = json.dumps(
+            content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+        self.compressed = gzip.compress(self.body, compresslevel=9, mtime=0)
+        self.etag = f'"{hashlib.sha256(self.body).hexdigest()[:32]}"'
+
+    def response(self, request: Request) -> Response:
+        """
+        Returns the body, gzipped if the client accepts it, or 304 if the
+        client already has it
+        """
+        headers = {
+            "Cache-Control": "no-cache",
+            "ETag": self.etag,
+            "Vary": "Accept-Encoding",
+        }
+        if self.etag in (
+            x.strip().removeprefix("W/")
+            for x in request.headers.get("if-none-match", "").split(",")
+        ):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        if "gzip" in request.headers.get("accept-encoding", ""):
+            headers["Content-Encoding"] = "gzip"
+            return Response(
+                self.compressed, media_type="application/json", headers=headers
+            )
+        return Response(self.body, media_type="application/json", headers=headers)
+
+
+class VersionRegistry:  # pylint: disable=too-few-public-methods
+    """
+    Versioned routers ordered by their version
+    """
+
+    def __init__(self):
+        self.versions: List[VersionModel] = []
+        self.listing = RenderedJson([])
+        self.latest: Optional[RenderedJson] = None
+
+    def mount(self, application: FastAPI):
+        """
+        Discovers the versioned routers, mounts them below their version and
+        renders the version responses
+        """
+        package = importlib.import_module("tracktor.routers")
+        modules = sorted(
+            (
+                importlib.import_module(f"{package.__name__}.{x.name}")
+                for x in pkgutil.iter_modules(package.__path__)
+                if VERSIONED_ROUTER.fullmatch(x.name)
+            ),
+            key=lambda x: Version(_version_name(x)),
+        )
+        for module in modules:
+            application.include_router(
+                module.router, prefix=f"/{_version_name(module)}"
+            )
+        self.versions = [
+            VersionModel(version=_version_name(x), changelog=x.__CHANGELOG__)
+            for x in modules
+        ]
+        self.listing = RenderedJson([x.dict() for x in self.versions])
+        self.latest = RenderedJson(self.versions[-1].version) if self.versions else None
+
+
+def _version_name(module) -> str:
+    return module.__name__.rsplit(".", 1)[1].replace("_", ".")
+
+
+def install_openapi(application: FastAPI):
+    """
+    Replaces the openapi route with one serving the schema rendered now. Call
+    this after all routers are included.
+    """
+    if not application.openapi_url:
+        return
+    schema = RenderedJson(application.openapi())
+    application.router.routes = [
+        x
+        for x in application.router.routes
+        if getattr(x, "path", None) != application.openapi_url
+    ]
+
+    async def openapi(request: Request) -> Response:
+        return schema.response(request)
+
+    application.add_route(application.openapi_url, openapi, include_in_schema=False)
+
+
+registry = VersionRegistry()
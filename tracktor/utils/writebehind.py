@@ -0,0 +1,82 @@
+"""
+Module for write-behind buffering of telemetry columns
+
+Values like the time of the last login do not need to be committed on the
+request that produced them. They are kept in memory, the latest value per
+row wins, and a background task writes them with one batched UPDATE per
+column in a fixed interval and on shutdown.
+"""
+import asyncio
+import logging
+from typing import Any, Dict, Tuple, Type
+
+from fastapi.logger import logger
+from sqlalchemy import bindparam, update
+from sqlmodel import SQLModel
+
+from tracktor.config import config
+from tracktor.utils.database import get_session_factory
+from tracktor.utils.tasks import BackgroundTask
+
+PendingWrites = Dict[Tuple[Type[SQLModel], str], Dict[Any, Any]]
+
+
+class WriteBehindBuffer(BackgroundTask):
+    """
+    Collects column updates in memory and flushes them in batches
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._pending: PendingWrites = {}
+
+    def record(self, model: Type[SQLModel], primary_key: Any, **values):
+        """
+        Buffers new values for the row of the model with the given primary key
+        """
+        for column, value in values.items():
+            self._pending.setdefault((model, column), {})[primary_key] = value
+
+    def __len__(self):
+        return sum(len(x) for x in self._pending.values())
+
+    async def flush(self):
+        """
+        Writes all buffered values, failed writes are kept for the next flush
+        """
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        try:
+            async with get_session_factory()() as session:
+                for (model, column), rows in pending.items():
+                    table = model.__table__
+                    (key,) = table.primary_key.columns
+                    await session.execute(
+                        update(table)
+                        .where(key == bindparam("_key"))
+                        .values({column: bindparam("_value")}),
+                        [{"_key": k, "_value": v} for k, v in rows.items()],
+                    )
+                await session.commit()
+        except Exception as err:  # pylint: disable=broad-except
+            logger.log(level=logging.ERROR, msg=f"Write-behind flush failed: {err}")
+            for target, rows in pending.items():
+                newer = self._pending.setdefault(target, {})
+                for primary_key, value in rows.items():
+                    newer.setdefault(primary_key, value)
+
+    async def stop(self):
+        """
+        Stops the flush loop and writes what is still buffered
+        """
+        await super().stop()
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(config.WRITE_BEHIND_INTERVAL_SECONDS)
+            await self.flush()
+
+
+write_behind = WriteBehindBuffer()